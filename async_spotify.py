@@ -0,0 +1,152 @@
+import asyncio
+import atexit
+import threading
+import time
+from collections import Counter
+import aiohttp
+from rate_limit import default_scheduler
+
+API_BASE = "https://api.spotify.com/v1"
+MAX_CONNECTIONS = 32
+KEEPALIVE_TIMEOUT = 30
+REQUEST_TIMEOUT = 10
+TOKEN_REFRESH_MARGIN = 60
+
+class SpotifyAPIError(Exception):
+    """Non-2xx response from the Web API, carrying the status and Retry-After hint."""
+
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(f"http status: {status}, {message}")
+        self.http_status = status
+        self.msg = message
+        self.retry_after = retry_after
+
+# A single event loop thread owns the pooled keep-alive connections for the process
+_loop = None
+_session = None
+_loop_lock = threading.Lock()
+
+def _get_loop():
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="spotify-async", daemon=True).start()
+                _loop = loop
+    return _loop
+
+def run_async(coro, timeout=None):
+    """Run coro on the shared Spotify event loop from synchronous code and return its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result(timeout)
+
+def submit_async(coro):
+    """Schedule coro on the shared Spotify event loop and return a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+def iter_async(agen):
+    """Iterate an async generator on the shared Spotify event loop from synchronous code."""
+    loop = _get_loop()
+    while True:
+        try:
+            yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+        except StopAsyncIteration:
+            return
+
+def _shared_session():
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, keepalive_timeout=KEEPALIVE_TIMEOUT)
+        _session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT))
+    return _session
+
+def close_shared_session(timeout=5):
+    """Close the pooled keep-alive connections; runs at interpreter exit."""
+    if _session is not None and not _session.closed and _loop is not None:
+        try:
+            run_async(_session.close(), timeout)
+        except Exception:
+            pass
+
+atexit.register(close_shared_session)
+
+class AsyncSpotify:
+    """Asyncio facade over the Spotify Web API calls the playlist pipeline makes.
+
+    Methods mirror spotipy's names and return the same JSON. Tokens come from a
+    spotipy auth manager; connections are pooled and kept alive across users.
+    """
+
+    def __init__(self, auth_manager, base_url=API_BASE, session=None, scheduler=None):
+        self.auth_manager = auth_manager
+        self.base_url = base_url.rstrip("/")
+        self._session = session
+        self.scheduler = scheduler or default_scheduler()
+        self._token_info = None
+        # HTTP requests made through this client (retries included), keyed by endpoint
+        self.calls = Counter()
+
+    async def _access_token(self):
+        """Return the access token, going back to the auth manager only near expiry."""
+        info = self._token_info
+        if info is None or info["expires_at"] - time.time() < TOKEN_REFRESH_MARGIN:
+            await asyncio.to_thread(self.auth_manager.get_access_token, as_dict=False)
+            info = self._token_info = self.auth_manager.get_cached_token()
+            self.calls["token"] += 1
+        return info["access_token"]
+
+    async def _request(self, endpoint, method, path, params=None, payload=None):
+        """Send a request through the shared scheduler (rate limits, retries, circuit breaker)."""
+        return await self.scheduler.call_async(endpoint, self._send, endpoint, method, path, params, payload)
+
+    async def _send(self, endpoint, method, path, params, payload):
+        token = await self._access_token()
+        session = self._session or _shared_session()
+        self.calls[endpoint] += 1
+        async with session.request(
+            method,
+            f"{self.base_url}/{path}",
+            params={k: v for k, v in (params or {}).items() if v is not None},
+            json=payload,
+            headers={"Authorization": f"Bearer {token}"},
+        ) as response:
+            if response.status >= 400:
+                retry_after = response.headers.get("Retry-After")
+                raise SpotifyAPIError(response.status, await response.text(),
+                                      int(retry_after) if retry_after and retry_after.isdigit() else None)
+            if response.status == 204:
+                return None
+            return await response.json()
+
+    async def me(self):
+        return await self._request("me", "GET", "me")
+
+    async def current_user(self):
+        return await self.me()
+
+    async def recommendations(self, seed_artists=None, seed_genres=None, seed_tracks=None, limit=20, country=None, **kwargs):
+        params = {"limit": limit, "market": country, **kwargs}
+        for name, seeds in (("seed_artists", seed_artists), ("seed_genres", seed_genres), ("seed_tracks", seed_tracks)):
+            if seeds:
+                params[name] = ",".join(seeds)
+        return await self._request("recommendations", "GET", "recommendations", params)
+
+    async def recommendation_genre_seeds(self):
+        return await self._request("recommendation_genre_seeds", "GET", "recommendations/available-genre-seeds")
+
+    async def tracks(self, tracks, market=None):
+        ids = ",".join(track.rsplit(":", 1)[-1] for track in tracks)
+        return await self._request("tracks", "GET", "tracks", {"ids": ids, "market": market})
+
+    async def search(self, q, limit=10, offset=0, type="track", market=None):
+        return await self._request("search", "GET", "search", {"q": q, "limit": limit, "offset": offset, "type": type, "market": market})
+
+    async def user_playlist_create(self, user, name, public=True, collaborative=False, description=""):
+        payload = {"name": name, "public": public, "collaborative": collaborative, "description": description}
+        return await self._request("user_playlist_create", "POST", f"users/{user}/playlists", payload=payload)
+
+    async def playlist_add_items(self, playlist_id, items, position=None):
+        payload = {"uris": list(items)}
+        if position is not None:
+            payload["position"] = position
+        return await self._request("playlist_add_items", "POST", f"playlists/{playlist_id}/tracks", payload=payload)
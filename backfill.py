@@ -0,0 +1,89 @@
+"""Classify large text logs (one text per line) with the moody classifier.
+
+    python backfill.py chats.txt diary.txt -o moods.tsv --jobs 8
+
+Input is streamed in chunks; chunks fan out to a joblib process pool and the
+labels come back in input order, one output line per input line.
+"""
+import argparse
+import os
+import sys
+import time
+from itertools import islice
+from joblib import Parallel, delayed, effective_n_jobs
+
+from moody_core import MOODS, analyze_moods
+
+CHUNK_SIZE = 20000
+
+def _read_lines(paths):
+    for path in paths:
+        if path == "-":
+            yield from (line.rstrip("\r\n") for line in sys.stdin)
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            yield from (line.rstrip("\r\n") for line in f)
+
+def _chunks(lines, size):
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+def classify_chunk(texts):
+    """Worker task: return (mood ids, compound scores) for a chunk of texts.
+
+    Workers are long-lived, so the VADER lexicon and keyword automaton load once
+    per process, on its first chunk.
+    """
+    return analyze_moods(texts)
+
+def backfill(paths, out, chunk_size=CHUNK_SIZE, jobs=None, scores=False):
+    """Classify every line of paths into out, in order; returns a throughput report."""
+    # Resolve joblib's negative counts (-1 = all cores) so the per-core figures are real
+    jobs = effective_n_jobs(jobs or os.cpu_count() or 1)
+    started = time.perf_counter()
+    lines = 0
+    results = Parallel(n_jobs=jobs, return_as="generator", pre_dispatch="2 * n_jobs")(
+        delayed(classify_chunk)(chunk) for chunk in _chunks(_read_lines(paths), chunk_size)
+    )
+    for mood_ids, compound in results:
+        if scores:
+            out.writelines(f"{MOODS[i]}\t{score:.4f}\n" for i, score in zip(mood_ids, compound))
+        else:
+            out.writelines(f"{MOODS[i]}\n" for i in mood_ids)
+        lines += len(mood_ids)
+    seconds = time.perf_counter() - started
+    lines_per_second = lines / seconds if seconds else 0.0
+    return {
+        "lines": lines,
+        "jobs": jobs,
+        "seconds": seconds,
+        "lines_per_second": lines_per_second,
+        "lines_per_second_per_core": lines_per_second / jobs,
+    }
+
+def main(argv=None):
+    """Command-line entry point; the report goes to stderr so labels can go to stdout."""
+    parser = argparse.ArgumentParser(description="Backfill mood labels for text logs")
+    parser.add_argument("inputs", nargs="+", metavar="input", help="text files, one entry per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes; negative counts as in joblib (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="lines per worker task")
+    parser.add_argument("--scores", action="store_true", help="also write the compound score after a tab")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        report = backfill(args.inputs, out, chunk_size=args.chunk_size, jobs=args.jobs, scores=args.scores)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"✅ Classified {report['lines']:,} lines in {report['seconds']:.1f}s: "
+          f"{report['lines_per_second']:,.0f} lines/s, {report['lines_per_second_per_core']:,.0f} lines/s per core "
+          f"({report['jobs']} workers)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import argparse
+import os
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+import numpy as np
+
+import moody
+import moody_core
+from keywords import KeywordMatcher
+from rate_limit import RequestScheduler, ScheduledSpotify
+import sentiment
+from track_index import TrackIndex
+
+SAMPLE_TEXTS = [
+    "I'm feeling great today",
+    "meh, just another day",
+    "Everything is awful and I can't stop crying",
+    "pumped for the party tonight",
+    "kind of tired but okay",
+]
+
+# Extra words for the batch parity check: VADER scales a lexicon word two places
+# after "this" or "so", so the fast path must route those texts to polarity_scores
+PARITY_WORDS = "this miserable wonderful evening weather hate awful so life is had".split()
+
+def _per_call_ms(fn, number):
+    """Return the mean latency of fn in milliseconds over number calls."""
+    return timeit.timeit(fn, number=number) / number * 1000
+
+def bench_analyzer(number):
+    """Compare building an analyzer per call against the shared one."""
+    texts = iter(SAMPLE_TEXTS * number)
+    fresh = _per_call_ms(lambda: SentimentIntensityAnalyzer().polarity_scores(next(texts)), number)
+    sentiment.get_analyzer()
+    texts = iter(SAMPLE_TEXTS * number)
+    shared = _per_call_ms(lambda: sentiment.get_analyzer().polarity_scores(next(texts)), number)
+    print(f"new analyzer per call: {fresh:.3f} ms/call")
+    print(f"shared analyzer:       {shared:.3f} ms/call ({fresh / shared:.1f}x faster)")
+
+def bench_batch(number):
+    """Compare analyze_mood in a loop against analyze_moods on the same texts."""
+    rng = random.Random(0)
+    vocab = [word for text in SAMPLE_TEXTS for word in text.split()] + PARITY_WORDS
+    texts = [" ".join(rng.choices(vocab, k=rng.randint(2, 10))) for _ in range(number * 50)]
+    sentiment.get_analyzer()
+    start = time.perf_counter()
+    scalar = [moody.analyze_mood(text)[0] for text in texts]
+    scalar_s = time.perf_counter() - start
+    start = time.perf_counter()
+    mood_ids, _ = moody.analyze_moods(texts)
+    batch_s = time.perf_counter() - start
+    assert [moody.MOODS[i] for i in mood_ids] == scalar, "batch and scalar moods differ"
+    print(f"analyze_mood loop: {len(texts) / scalar_s:,.0f} texts/s")
+    print(f"analyze_moods:     {len(texts) / batch_s:,.0f} texts/s ({scalar_s / batch_s:.1f}x faster)")
+
+def bench_memo(number):
+    """Compare scoring every prompt against the score memo on head-heavy traffic."""
+    rng = random.Random(0)
+    # Most prompts are casing/punctuation variants of a few phrases; the tail is unique
+    head = [rng.choice([text, text.upper(), text + "!", f"  {text}. "]) for text in SAMPLE_TEXTS * 20]
+    texts = [rng.choice(head) if rng.random() < 0.9 else f"{rng.choice(SAMPLE_TEXTS)} #{i}" for i in range(number * 20)]
+    analyzer = sentiment.get_analyzer()
+    start = time.perf_counter()
+    for text in texts:
+        analyzer.polarity_scores(text)
+    plain_s = time.perf_counter() - start
+    memo = sentiment.ScoreMemo()
+    start = time.perf_counter()
+    for text in texts:
+        sentiment.memo_score(text, memo)
+    memo_s = time.perf_counter() - start
+    print(f"VADER every prompt: {len(texts) / plain_s:,.0f} texts/s")
+    print(f"score memo:         {len(texts) / memo_s:,.0f} texts/s ({plain_s / memo_s:.1f}x faster, "
+          f"hit rate {memo.stats()['hit_rate']:.0%})")
+
+def bench_keywords(number):
+    """Compare per-mood substring scans against KeywordMatcher on a large slang list."""
+    rng = random.Random(0)
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))) for _ in range(40_000)]
+    keywords_by_mood = {mood: words[i::len(moody.MOODS)] for i, mood in enumerate(moody.MOODS)}
+    matcher = KeywordMatcher(keywords_by_mood)
+    texts = [text.lower() for text in SAMPLE_TEXTS]
+
+    def linear(text_lower):
+        for mood, keywords in keywords_by_mood.items():
+            if any(keyword in text_lower for keyword in keywords):
+                return mood
+        return None
+
+    scan = _per_call_ms(lambda: [linear(text) for text in texts], number) / len(texts)
+    compiled = _per_call_ms(lambda: [matcher.match(text) for text in texts], number) / len(texts)
+    print(f"{len(words):,} keywords, linear scan:    {scan:.4f} ms/text")
+    print(f"{len(words):,} keywords, KeywordMatcher: {compiled:.4f} ms/text ({scan / compiled:.0f}x faster)")
+
+class SlowSearchSpotify:
+    """Stub client whose recommendations fail and whose searches take `latency` seconds."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def recommendations(self, **params):
+        raise RuntimeError("recommendations unavailable")
+
+    def search(self, q, type, limit, market):
+        time.sleep(self.latency)
+        return {"tracks": {"items": [
+            {"name": f"{q} {i}", "artists": [{"name": "Stub"}], "external_urls": {"spotify": f"https://open.spotify.com/track/{q}{i}"}, "uri": f"spotify:track:{q}{i}"}
+            for i in range(limit)
+        ]}}
+
+def bench_fallback(number):
+    """Compare the old sequential fallback search loop against get_tracks' concurrent one."""
+    stub = SlowSearchSpotify(latency=0.15)
+    sp = ScheduledSpotify(stub, RequestScheduler())
+    terms = moody.MOOD_SETTINGS["happy"]["search_terms"]
+    start = time.perf_counter()
+    for term in terms:
+        stub.search(q=term, type="track", limit=5, market="US")
+        time.sleep(0.2)
+    sequential = time.perf_counter() - start
+    start = time.perf_counter()
+    tracks = moody.search_tracks(sp, terms)
+    concurrent = time.perf_counter() - start
+    assert len(tracks) == 5 * len(terms)
+    print(f"sequential fallback ({len(terms)} terms): {sequential * 1000:.0f} ms")
+    print(f"concurrent fallback ({len(terms)} terms): {concurrent * 1000:.0f} ms ({sequential / concurrent:.1f}x faster)")
+
+def bench_rerun(number):
+    """Time parsing the Streamlit script and full reruns of it through AppTest."""
+    from streamlit.testing.v1 import AppTest
+
+    with open("moody_app.py", encoding="utf-8") as f:
+        source = f.read()
+    parse = _per_call_ms(lambda: compile(source, "moody_app.py", "exec"), number)
+    start = time.perf_counter()
+    app = AppTest.from_file("moody_app.py").run()
+    startup = (time.perf_counter() - start) * 1000
+    rerun = _per_call_ms(app.run, max(1, number // 10))
+    print(f"script parse: {parse:.3f} ms")
+    print(f"first run:    {startup:.1f} ms")
+    print(f"rerun:        {rerun:.1f} ms")
+
+def synthetic_catalog(size, seed=0):
+    """A TrackIndex of `size` random tracks."""
+    rng = np.random.default_rng(seed)
+    ids = np.char.add("track", np.arange(size).astype(str))
+    return TrackIndex(ids, ids, np.char.add("artist", (np.arange(size) % 5000).astype(str)),
+                      rng.random(size, dtype=np.float32), rng.random(size, dtype=np.float32),
+                      rng.integers(0, 101, size))
+
+def bench_index(number):
+    """Time mood lookups against a synthetic one-million-track catalog."""
+    start = time.perf_counter()
+    index = synthetic_catalog(1_000_000)
+    print(f"built 1,000,000-track index in {time.perf_counter() - start:.2f} s")
+    for mood, config in moody_core.MOOD_SETTINGS.items():
+        params = moody_core.recommendation_params(config)
+        ms = _per_call_ms(lambda: index.nearest(params["target_valence"], params["target_energy"], k=params["limit"],
+                                                valence_range=config["valence_range"], energy_range=config["energy_range"]), number)
+        print(f"{mood:>7} nearest-15 lookup: {ms:.3f} ms")
+
+def bench_load(number):
+    """Run every pipeline flow against the local fake Spotify API with 10 concurrent users."""
+    import loadtest
+    from fake_spotify import FakeSpotifyServer
+
+    server = FakeSpotifyServer(latency=0.05, jitter=0.02)
+    server.start()
+    try:
+        for flow in ("cli", "sync", "app"):
+            loadtest.print_report(loadtest.run_load(server, flow, users=10, playlists=max(1, number // 100)))
+    finally:
+        server.stop()
+
+def _time_to_prompt(argv, cwd, env):
+    """Seconds from spawning argv until the CLI's mood prompt shows up on its stdout."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(argv, cwd=cwd, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    output = b""
+    while b"How are you feeling" not in output:
+        chunk = os.read(proc.stdout.fileno(), 4096)
+        if not chunk:
+            break
+        output += chunk
+    elapsed = time.perf_counter() - start
+    proc.kill()
+    proc.wait()
+    return elapsed
+
+def bench_startup(number):
+    """Measure `import moody` with -X importtime and the CLI's time to prompt."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import moody"], cwd=here,
+                            capture_output=True, text=True, check=True)
+    # "import time: self | cumulative | name", with the name indented two spaces per nesting level
+    # and children listed before their parent
+    children = []
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        if not name.startswith("   "):
+            if name.strip() == "moody":
+                total, deps = int(cumulative), sorted(children, reverse=True)
+            children = []
+        elif name[3] != " ":
+            children.append((int(cumulative), name.strip()))
+    print(f"import moody: {total / 1000:.1f} ms (heaviest: {', '.join(f'{n} {c / 1000:.1f} ms' for c, n in deps[:4])})")
+    eager = subprocess.run([sys.executable, "-c", "import time; t = time.perf_counter(); import moody, spotipy, "
+                            "async_spotify, sentiment, playlist_writer, seed_validation, track_index; "
+                            "sentiment.get_analyzer(); print(time.perf_counter() - t)"],
+                           cwd=here, capture_output=True, text=True, check=True)
+    print(f"eager imports + lexicon: {float(eager.stdout) * 1000:.1f} ms")
+    # Run from an empty directory with dummy credentials so login is never attempted for real
+    env = dict(os.environ, SPOTIPY_CLIENT_ID="bench", SPOTIPY_CLIENT_SECRET="bench")
+    with tempfile.TemporaryDirectory() as cwd:
+        runs = [_time_to_prompt([sys.executable, os.path.join(here, "moody.py")], cwd, env) for _ in range(max(3, number // 40))]
+    print(f"time to prompt (python moody.py): {min(runs) * 1000:.0f} ms best of {len(runs)}")
+
+BENCHMARKS = {
+    "analyzer": bench_analyzer,
+    "batch": bench_batch,
+    "memo": bench_memo,
+    "keywords": bench_keywords,
+    "fallback": bench_fallback,
+    "rerun": bench_rerun,
+    "index": bench_index,
+    "load": bench_load,
+    "startup": bench_startup,
+}
+
+def main():
+    """Run the requested microbenchmarks."""
+    parser = argparse.ArgumentParser(description="Moody microbenchmarks")
+    parser.add_argument("names", nargs="*", metavar="name", help=f"one of: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("-n", "--number", type=int, default=200, help="iterations per benchmark")
+    args = parser.parse_args()
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    for name in args.names or BENCHMARKS:
+        print(f"== {name} ==")
+        BENCHMARKS[name](args.number)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Binary track catalog opened through mmap without copying or parsing.
+
+Layout (little endian, every section 64-byte aligned):
+
+    header        magic, version, grid size, id width, row count, bucket count,
+                  then the byte offset of each section below
+    valence       float32[rows]      rows are sorted by valence x energy grid cell
+    energy        float32[rows]
+    popularity    uint8[rows]
+    ids           S{id width}[rows]  Spotify track ids, NUL padded
+    name_offsets  uint64[rows + 1]   name of row r is name_blob[off[r]:off[r + 1]]
+    name_blob     utf-8 bytes
+    artist_offsets, artist_blob      same scheme for the first artist
+    cell_starts   int64[grid * grid + 1]
+    bucket_starts uint64[buckets + 1]  URI hash index: FNV-1a(id) % buckets
+    bucket_rows   uint64[rows]         rows grouped by bucket
+"""
+import argparse
+import json
+import mmap
+import struct
+import sys
+import time
+import numpy as np
+
+from track_index import GRID_SIZE, TrackIndex
+
+MAGIC = b"MOODCAT1"
+VERSION = 1
+SECTIONS = ("valence", "energy", "popularity", "ids", "name_offsets", "name_blob",
+            "artist_offsets", "artist_blob", "cell_starts", "bucket_starts", "bucket_rows")
+HEADER = struct.Struct(f"<8sIIIQQ{len(SECTIONS)}Q")
+ALIGNMENT = 64
+FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+FNV_PRIME = np.uint64(0x100000001b3)
+
+def _fnv1a(ids):
+    """FNV-1a hash of each fixed-width id (padding included), vectorized over rows."""
+    data = np.frombuffer(ids.tobytes(), dtype=np.uint8).reshape(len(ids), ids.dtype.itemsize)
+    hashes = np.full(len(ids), FNV_OFFSET, dtype=np.uint64)
+    for column in data.T:
+        hashes ^= column
+        hashes *= FNV_PRIME
+    return hashes
+
+def _track_id(uri):
+    return uri.rsplit(":", 1)[-1]
+
+class StringColumn:
+    """Variable-length strings decoded lazily from an offset table over a byte blob."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+    @staticmethod
+    def encode(strings):
+        """Return (offsets, blob) for a sequence of strings."""
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+class Catalog(TrackIndex):
+    """TrackIndex whose columns are zero-copy views over a memory-mapped catalog file.
+
+    The mapping is read-only, so worker processes opening the same file share its pages.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, grid_size, id_width, rows, buckets, *offsets = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} moody catalog")
+        buffer = memoryview(self._mmap)
+        section = dict(zip(SECTIONS, offsets))
+
+        def column(name, dtype, count):
+            return np.frombuffer(buffer, dtype=dtype, count=count, offset=section[name])
+
+        def blob(name, size):
+            return buffer[section[name]:section[name] + size]
+
+        name_offsets = column("name_offsets", np.uint64, rows + 1)
+        artist_offsets = column("artist_offsets", np.uint64, rows + 1)
+        super().__init__(
+            ids=column("ids", f"S{id_width}", rows),
+            names=StringColumn(name_offsets, blob("name_blob", int(name_offsets[-1]))),
+            artists=StringColumn(artist_offsets, blob("artist_blob", int(artist_offsets[-1]))),
+            valence=column("valence", np.float32, rows),
+            energy=column("energy", np.float32, rows),
+            popularity=column("popularity", np.uint8, rows),
+            grid_size=grid_size,
+            cell_starts=column("cell_starts", np.int64, grid_size * grid_size + 1),
+        )
+        self.bucket_starts = column("bucket_starts", np.uint64, buckets + 1)
+        self.bucket_rows = column("bucket_rows", np.uint64, rows)
+
+    def row_for_uri(self, uri):
+        """Return the row of a track URI (or bare id), or None if it isn't in the catalog."""
+        try:
+            track_id = _track_id(uri).encode("ascii")
+        except UnicodeEncodeError:
+            return None
+        # A longer id would be silently truncated to the column width and could match a prefix
+        if not track_id or len(track_id) > self.ids.dtype.itemsize:
+            return None
+        key = np.array([track_id], dtype=self.ids.dtype)
+        bucket = int(_fnv1a(key)[0] % np.uint64(len(self.bucket_starts) - 1))
+        for row in self.bucket_rows[self.bucket_starts[bucket]:self.bucket_starts[bucket + 1]]:
+            if self.ids[row] == key[0]:
+                return int(row)
+        return None
+
+def open_catalog(path):
+    """Map a catalog file written by write_catalog."""
+    return Catalog(path)
+
+def write_catalog(path, tracks, grid_size=GRID_SIZE):
+    """Write track dicts (uri or id, name, artist, valence, energy, popularity) as a catalog file."""
+    tracks = [dict(t, id=t.get("id") or _track_id(t["uri"])) for t in tracks]
+    index = TrackIndex.from_tracks(tracks, grid_size=grid_size)
+    ids = np.char.encode(index.ids.astype(str), "ascii")
+    rows = len(index)
+    buckets = max(1, rows)
+    bucket_of = _fnv1a(ids) % np.uint64(buckets)
+    bucket_rows = np.argsort(bucket_of, kind="stable").astype(np.uint64)
+    bucket_starts = np.searchsorted(bucket_of[bucket_rows], np.arange(buckets + 1)).astype(np.uint64)
+    name_offsets, name_blob = StringColumn.encode(index.names.astype(str))
+    artist_offsets, artist_blob = StringColumn.encode(index.artists.astype(str))
+    arrays = {
+        "valence": index.valence.astype("<f4"),
+        "energy": index.energy.astype("<f4"),
+        "popularity": index.popularity.astype(np.uint8),
+        "ids": ids,
+        "name_offsets": name_offsets,
+        "name_blob": name_blob,
+        "artist_offsets": artist_offsets,
+        "artist_blob": artist_blob,
+        "cell_starts": index.cell_starts.astype("<i8"),
+        "bucket_starts": bucket_starts,
+        "bucket_rows": bucket_rows,
+    }
+    offsets, position = [], HEADER.size
+    for name in SECTIONS:
+        position += -position % ALIGNMENT
+        offsets.append(position)
+        position += arrays[name].nbytes
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, grid_size, ids.dtype.itemsize, rows, buckets, *offsets))
+        for name, offset in zip(SECTIONS, offsets):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(arrays[name].tobytes())
+    return rows
+
+def _read_tracks(path):
+    """Read track dicts from a JSON list or JSON Lines file."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def _with_features(tracks, sp):
+    """Fill in valence/energy/popularity from Spotify for tracks that lack them."""
+    missing = [t for t in tracks if "valence" not in t or "energy" not in t]
+    for start in range(0, len(missing), 50):
+        batch = missing[start:start + 50]
+        ids = [_track_id(t["uri"]) for t in batch]
+        for track, feature, detail in zip(batch, sp.audio_features(ids), sp.tracks(ids)["tracks"]):
+            if feature:
+                track.update(valence=feature["valence"], energy=feature["energy"])
+            if detail:
+                track.setdefault("popularity", detail["popularity"])
+    return tracks
+
+def main(argv=None):
+    """Build or inspect catalog files from the track dicts get_tracks returns."""
+    parser = argparse.ArgumentParser(description="Moody track catalog tool")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="convert a JSON/JSONL list of track dicts into a catalog")
+    build.add_argument("input")
+    build.add_argument("output")
+    build.add_argument("--fetch-features", action="store_true", help="look up missing valence/energy on Spotify")
+    info = commands.add_parser("info", help="open a catalog and report its size and open time")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        tracks = _read_tracks(args.input)
+        if args.fetch_features:
+            from moody import initialize_spotify_client
+            tracks = _with_features(tracks, initialize_spotify_client())
+        usable = [t for t in tracks if "valence" in t and "energy" in t]
+        if len(usable) < len(tracks):
+            print(f"⚠️ Skipping {len(tracks) - len(usable)} tracks without valence/energy", file=sys.stderr)
+        rows = write_catalog(args.output, usable)
+        print(f"✅ Wrote {rows} tracks to {args.output}")
+    else:
+        start = time.perf_counter()
+        catalog = open_catalog(args.path)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{args.path}: {len(catalog):,} tracks, grid {catalog.grid_size}x{catalog.grid_size}, opened in {elapsed:.2f} ms")
+
+if __name__ == "__main__":
+    main()
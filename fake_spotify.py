@@ -0,0 +1,149 @@
+"""Local stand-in for the Spotify Web API, for benchmarks and offline runs.
+
+Serves the endpoints the playlist pipeline uses with configurable latency,
+error rate and a server-side rate limit that answers 429 + Retry-After,
+the way the real API does. Point AsyncSpotify(base_url=...) or a spotipy
+client's `prefix` attribute at FakeSpotifyServer.base_url.
+"""
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from collections import Counter
+from aiohttp import web
+from rate_limit import TokenBucket
+
+GENRE_SEEDS = ["acoustic", "ambient", "blues", "chill", "dance", "edm", "indie", "pop", "rock", "sad"]
+
+def _track(key, i):
+    track_id = hashlib.sha1(f"{key}:{i}".encode()).hexdigest()[:22]
+    return {
+        "id": track_id,
+        "name": f"Track {track_id[:6]}",
+        "artists": [{"name": f"Artist {track_id[6:10]}"}],
+        "uri": f"spotify:track:{track_id}",
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+        "preview_url": None,
+        "popularity": 50,
+    }
+
+class FakeAuth:
+    """Auth manager handing out a constant, never-expiring token."""
+
+    def get_access_token(self, as_dict=False):
+        return self.get_cached_token() if as_dict else "fake-token"
+
+    def get_cached_token(self):
+        return {"access_token": "fake-token", "expires_at": time.time() + 3600}
+
+class FakeSpotifyServer:
+    """aiohttp server on its own event loop thread.
+
+    latency/jitter are seconds added to every response, error_rate is the share
+    of requests answered 503, and rate_limit (requests/second, None = unlimited)
+    makes the server answer 429 with Retry-After once its bucket is empty.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0, rate_limit=None, retry_after=1, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.bucket = TokenBucket(rate_limit, rate_limit) if rate_limit else None
+        self._rng = random.Random(seed)
+        # Requests received, keyed by endpoint name (as AsyncSpotify.calls) and by status
+        self.requests = Counter()
+        self.statuses = Counter()
+        # URIs added to each playlist, in the order the server accepted them
+        self.playlists = {}
+        self.base_url = None
+        self._loop = None
+        self._runner = None
+
+    @web.middleware
+    async def _simulate(self, request, handler):
+        endpoint = request.match_info.route.name or "unknown"
+        self.requests[endpoint] += 1
+        await asyncio.sleep(max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter)))
+        if self.bucket is not None and not self.bucket.try_acquire():
+            response = web.json_response({"error": {"status": 429, "message": "API rate limit exceeded"}},
+                                         status=429, headers={"Retry-After": str(self.retry_after)})
+        elif self._rng.random() < self.error_rate:
+            response = web.json_response({"error": {"status": 503, "message": "Service unavailable"}}, status=503)
+        else:
+            response = await handler(request)
+        self.statuses[response.status] += 1
+        return response
+
+    async def _me(self, request):
+        return web.json_response({"id": "fake-user", "display_name": "Fake User"})
+
+    async def _recommendations(self, request):
+        limit = int(request.query.get("limit", 20))
+        key = "&".join(f"{k}={v}" for k, v in sorted(request.query.items()))
+        return web.json_response({"tracks": [_track(key, i) for i in range(limit)]})
+
+    async def _genre_seeds(self, request):
+        return web.json_response({"genres": GENRE_SEEDS})
+
+    async def _search(self, request):
+        limit = int(request.query.get("limit", 10))
+        return web.json_response({"tracks": {"items": [_track(request.query.get("q", ""), i) for i in range(limit)]}})
+
+    async def _tracks(self, request):
+        ids = request.query.get("ids", "").split(",")
+        if len(ids) > 50 or any(len(track_id) != 22 for track_id in ids):
+            return web.json_response({"error": {"status": 400, "message": "invalid id"}}, status=400)
+        return web.json_response({"tracks": [dict(_track("", 0), id=track_id) for track_id in ids]})
+
+    async def _create_playlist(self, request):
+        body = await request.json()
+        playlist_id = hashlib.sha1(f"{request.match_info['user']}:{len(self.playlists)}".encode()).hexdigest()[:22]
+        self.playlists[playlist_id] = []
+        return web.json_response({"id": playlist_id, "name": body.get("name"),
+                                  "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist_id}"}}, status=201)
+
+    async def _add_items(self, request):
+        body = await request.json()
+        # spotipy sends a bare list of URIs, the Web API documents {"uris": [...]}
+        uris = body if isinstance(body, list) else body.get("uris", [])
+        if len(uris) > 100:
+            return web.json_response({"error": {"status": 400, "message": "Too many ids requested"}}, status=400)
+        self.playlists.setdefault(request.match_info["playlist"], []).extend(uris)
+        return web.json_response({"snapshot_id": "fake-snapshot"}, status=201)
+
+    def _app(self):
+        # spotipy adds a trailing slash to some paths and posts to /items instead of /tracks
+        app = web.Application(middlewares=[self._simulate])
+        app.router.add_get("/v1/me{slash:/?}", self._me, name="me")
+        app.router.add_get("/v1/recommendations{slash:/?}", self._recommendations, name="recommendations")
+        app.router.add_get("/v1/recommendations/available-genre-seeds{slash:/?}", self._genre_seeds, name="recommendation_genre_seeds")
+        app.router.add_get("/v1/search{slash:/?}", self._search, name="search")
+        app.router.add_get("/v1/tracks{slash:/?}", self._tracks, name="tracks")
+        app.router.add_post("/v1/users/{user}/playlists{slash:/?}", self._create_playlist, name="user_playlist_create")
+        app.router.add_post("/v1/playlists/{playlist}/{kind:tracks|items}{slash:/?}", self._add_items, name="playlist_add_items")
+        return app
+
+    async def _start(self, port):
+        self._runner = web.AppRunner(self._app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        return site._server.sockets[0].getsockname()[1]
+
+    def start(self, port=0):
+        """Serve on 127.0.0.1 (port 0 picks a free one) and return the base URL."""
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="fake-spotify", daemon=True).start()
+        port = asyncio.run_coroutine_threadsafe(self._start(port), self._loop).result()
+        self.base_url = f"http://127.0.0.1:{port}/v1"
+        return self.base_url
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def reset(self):
+        self.requests.clear()
+        self.statuses.clear()
@@ -0,0 +1,141 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Defaults can be overridden from .env
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "moody", "history.db")
+DAY = 24 * 3600
+WEEK = 7 * DAY
+
+# Aggregates maintained on every append, so analytics never rescan the history:
+# per-mood totals, per-day mood counts (rolling windows) and consecutive-mood transitions.
+_AGGREGATE_TABLES = (
+    "CREATE TABLE IF NOT EXISTS mood_totals (user TEXT, mood TEXT, count INTEGER, PRIMARY KEY (user, mood))",
+    "CREATE TABLE IF NOT EXISTS mood_daily (user TEXT, day INTEGER, mood TEXT, count INTEGER, PRIMARY KEY (user, day, mood))",
+    "CREATE TABLE IF NOT EXISTS mood_transitions (user TEXT, prev TEXT, next TEXT, count INTEGER, PRIMARY KEY (user, prev, next))",
+    "CREATE TABLE IF NOT EXISTS last_mood (user TEXT PRIMARY KEY, mood TEXT)",
+)
+
+class HistoryStore:
+    """Append-only mood history in SQLite, indexed by (user, timestamp).
+
+    Range and most-recent queries walk the index, so they cost O(log n + rows
+    returned) no matter how long the history grows. Mood analytics come from
+    aggregate tables updated in the same transaction as each append. One
+    connection is shared by all threads behind a lock.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                "id INTEGER PRIMARY KEY, user TEXT NOT NULL, ts REAL NOT NULL, mood TEXT NOT NULL, text TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS history_user_ts ON history (user, ts)")
+            for statement in _AGGREGATE_TABLES:
+                self._db.execute(statement)
+            if self._db.execute("SELECT NOT EXISTS (SELECT 1 FROM last_mood) AND EXISTS (SELECT 1 FROM history)").fetchone()[0]:
+                self._rebuild_aggregates()
+
+    def _rebuild_aggregates(self):
+        """Fill the aggregate tables from the full history (once, for stores that predate them)."""
+        self._db.execute("INSERT INTO mood_totals SELECT user, mood, COUNT(*) FROM history GROUP BY user, mood")
+        self._db.execute(f"INSERT INTO mood_daily SELECT user, CAST(ts / {DAY} AS INTEGER) AS day, mood, COUNT(*) "
+                         "FROM history GROUP BY user, day, mood")
+        self._db.execute(
+            "INSERT INTO mood_transitions SELECT user, prev, mood, COUNT(*) FROM ("
+            "SELECT user, mood, LAG(mood) OVER (PARTITION BY user ORDER BY ts, id) AS prev FROM history"
+            ") WHERE prev IS NOT NULL GROUP BY user, prev, mood"
+        )
+        self._db.execute(
+            "INSERT INTO last_mood SELECT user, mood FROM ("
+            "SELECT user, mood, ROW_NUMBER() OVER (PARTITION BY user ORDER BY ts DESC, id DESC) AS n FROM history"
+            ") WHERE n = 1"
+        )
+
+    def append(self, user, mood, text, ts=None):
+        """Record one entry and update the aggregates (a constant number of indexed upserts); returns its timestamp."""
+        ts = time.time() if ts is None else ts
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO history (user, ts, mood, text) VALUES (?, ?, ?, ?)", (user, ts, mood, text))
+            self._db.execute("INSERT INTO mood_totals VALUES (?, ?, 1) ON CONFLICT (user, mood) DO UPDATE SET count = count + 1",
+                             (user, mood))
+            self._db.execute("INSERT INTO mood_daily VALUES (?, ?, ?, 1) ON CONFLICT (user, day, mood) DO UPDATE SET count = count + 1",
+                             (user, int(ts // DAY), mood))
+            previous = self._db.execute("SELECT mood FROM last_mood WHERE user = ?", (user,)).fetchone()
+            if previous:
+                self._db.execute("INSERT INTO mood_transitions VALUES (?, ?, ?, 1) "
+                                 "ON CONFLICT (user, prev, next) DO UPDATE SET count = count + 1", (user, previous[0], mood))
+            self._db.execute("INSERT OR REPLACE INTO last_mood VALUES (?, ?)", (user, mood))
+        return ts
+
+    def recent(self, user, limit=5):
+        """Return the user's latest (ts, mood, text) entries, newest first."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT ts, mood, text FROM history WHERE user = ? ORDER BY ts DESC LIMIT ?", (user, limit)
+            ).fetchall()
+
+    def between(self, user, start, end=None, limit=None):
+        """Return (ts, mood, text) entries with start <= ts < end, oldest first."""
+        end = float("inf") if end is None else end
+        with self._lock:
+            return self._db.execute(
+                "SELECT ts, mood, text FROM history WHERE user = ? AND ts >= ? AND ts < ? ORDER BY ts LIMIT ?",
+                (user, start, end, -1 if limit is None else limit)
+            ).fetchall()
+
+    def mood_counts(self, user, start, end=None):
+        """Return {mood: entries} for the user between start and end, e.g. moods this week."""
+        end = float("inf") if end is None else end
+        with self._lock:
+            return dict(self._db.execute(
+                "SELECT mood, COUNT(*) FROM history WHERE user = ? AND ts >= ? AND ts < ? GROUP BY mood",
+                (user, start, end)
+            ).fetchall())
+
+    def totals(self, user):
+        """Return {mood: entries} over the user's whole history."""
+        with self._lock:
+            return dict(self._db.execute("SELECT mood, count FROM mood_totals WHERE user = ?", (user,)).fetchall())
+
+    def daily_counts(self, user, days=30, now=None):
+        """Return [(day start timestamp, {mood: entries})] for the last `days` days, oldest first, empty days included."""
+        today = int((time.time() if now is None else now) // DAY)
+        with self._lock:
+            rows = self._db.execute("SELECT day, mood, count FROM mood_daily WHERE user = ? AND day > ?",
+                                    (user, today - days)).fetchall()
+        by_day = {day: {} for day in range(today - days + 1, today + 1)}
+        for day, mood, count in rows:
+            if day in by_day:
+                by_day[day][mood] = count
+        return [(day * DAY, counts) for day, counts in by_day.items()]
+
+    def rolling_counts(self, user, days=7, now=None):
+        """Return {mood: entries} over the last `days` days from the daily aggregates."""
+        totals = {}
+        for _, counts in self.daily_counts(user, days, now):
+            for mood, count in counts.items():
+                totals[mood] = totals.get(mood, 0) + count
+        return totals
+
+    def transitions(self, user):
+        """Return {(previous mood, next mood): count} over consecutive entries."""
+        with self._lock:
+            rows = self._db.execute("SELECT prev, next, count FROM mood_transitions WHERE user = ?", (user,)).fetchall()
+        return {(prev, mood): count for prev, mood, count in rows}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+def history_store_from_env():
+    """Open the store at MOODY_HISTORY_DB (default ~/.cache/moody/history.db)."""
+    return HistoryStore(os.getenv("MOODY_HISTORY_DB", DEFAULT_PATH))
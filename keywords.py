@@ -0,0 +1,53 @@
+from collections import deque
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over mood keywords.
+
+    Built once from an ordered {mood: keywords} mapping; match() scans the text in a
+    single pass and returns the earliest mood that has any keyword in it, the same
+    answer as checking `keyword in text` mood by mood.
+    """
+
+    def __init__(self, keywords_by_mood):
+        self.moods = list(keywords_by_mood)
+        no_match = len(self.moods)
+        self._goto = [{}]
+        self._out = [no_match]
+        for priority, keywords in enumerate(keywords_by_mood.values()):
+            for keyword in keywords:
+                node = 0
+                for ch in keyword:
+                    child = self._goto[node].get(ch)
+                    if child is None:
+                        child = self._goto[node][ch] = len(self._goto)
+                        self._goto.append({})
+                        self._out.append(no_match)
+                    node = child
+                self._out[node] = min(self._out[node], priority)
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                state = self._fail[node]
+                while state and ch not in self._goto[state]:
+                    state = self._fail[state]
+                self._fail[child] = self._goto[state].get(ch, 0)
+                # A node also reports every keyword that ends at its failure state
+                self._out[child] = min(self._out[child], self._out[self._fail[child]])
+
+    def match(self, text_lower):
+        """Return the highest-priority mood with a keyword in text_lower, or None."""
+        goto, fail, out = self._goto, self._fail, self._out
+        best = out[0]
+        node = 0
+        for ch in text_lower:
+            if best == 0:
+                break
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node] < best:
+                best = out[node]
+        return self.moods[best] if best < len(self.moods) else None
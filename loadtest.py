@@ -0,0 +1,170 @@
+"""Drive the playlist pipeline with concurrent synthetic users against FakeSpotifyServer.
+
+    python loadtest.py --flow cli --users 20 --playlists 5 --latency 0.08 --error-rate 0.02
+
+Flows: "cli" runs moody's analyze_mood / get_tracks_async / create_playlist_async,
+"sync" the spotipy-based get_tracks / create_playlist on threads, "app" the
+Streamlit handler's core (moody_core.stream_tracks / save_playlist), and "pool"
+the app flow sampling warm TrackPools built by a PoolRefresher before the run.
+Reports throughput, per-playlist latency percentiles and API calls per playlist.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+import moody
+import moody_core
+from async_spotify import AsyncSpotify, run_async
+from fake_spotify import FakeAuth, FakeSpotifyServer
+from rate_limit import ENDPOINT_LIMITS, RequestScheduler, scheduled_spotipy
+from spotify_cache import MemoryCache
+from track_pools import PoolRefresher, TrackPools
+
+PROMPTS = [
+    "I'm feeling great today",
+    "meh, just another day",
+    "Everything is awful and I can't stop crying",
+    "pumped for the party tonight",
+    "kind of tired but okay",
+    "best day ever, wow",
+    "a bit lonely tonight",
+    "calm and peaceful evening",
+]
+
+async def _cli_playlist(client, prompt, cache, pools=None):
+    mood, mood_config = moody.analyze_mood(prompt)
+    tracks = await moody.get_tracks_async(client, mood_config, cache=cache)
+    return await moody.create_playlist_async(client, mood, prompt, tracks) is not None
+
+async def _app_playlist(client, prompt, cache, pools=None):
+    mood, mood_config = moody_core.analyze_mood(prompt)
+    tracks, fallback = [], False
+    async for source, track in moody_core.stream_tracks(client, mood, mood_config, pools=pools, cache=cache):
+        fallback = fallback or source == "search"
+        tracks.append(track)
+    if not tracks or fallback:
+        return False
+    await moody_core.save_playlist(client, "fake-user", mood, mood_config, prompt, [t["uri"] for t in tracks])
+    return True
+
+def _sync_playlist(sp, prompt, cache):
+    mood, mood_config = moody.analyze_mood(prompt)
+    tracks = moody.get_tracks(sp, mood_config, cache=cache)
+    return moody.create_playlist(sp, mood, prompt, tracks) is not None
+
+ASYNC_FLOWS = {"cli": _cli_playlist, "app": _app_playlist, "pool": _app_playlist}
+
+def _user_prompts(user, playlists):
+    return [PROMPTS[(user * 3 + i) % len(PROMPTS)] for i in range(playlists)]
+
+def _timed(results, ok, started):
+    results.append((time.perf_counter() - started, ok))
+
+async def _run_async_users(flow, base_url, scheduler, cache, users, playlists, pools=None):
+    results = []
+
+    async def user(n):
+        client = AsyncSpotify(FakeAuth(), base_url=base_url, scheduler=scheduler)
+        for prompt in _user_prompts(n, playlists):
+            started = time.perf_counter()
+            try:
+                ok = await ASYNC_FLOWS[flow](client, prompt, cache, pools)
+            except Exception:
+                ok = False
+            _timed(results, ok, started)
+
+    await asyncio.gather(*(user(n) for n in range(users)))
+    return results
+
+def _run_sync_users(base_url, scheduler, cache, users, playlists):
+    results = []
+
+    def user(n):
+        sp = scheduled_spotipy(FakeAuth(), scheduler, base_url)
+        for prompt in _user_prompts(n, playlists):
+            started = time.perf_counter()
+            try:
+                ok = _sync_playlist(sp, prompt, cache)
+            except Exception:
+                ok = False
+            _timed(results, ok, started)
+
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(user, range(users)))
+    return results
+
+def run_load(server, flow="cli", users=10, playlists=3, unthrottled=False):
+    """Run one load test against a started server; returns a report dict."""
+    limits = {endpoint: (1e6, 1e6) for endpoint in (*ENDPOINT_LIMITS, "tracks", "recommendation_genre_seeds")} if unthrottled else None
+    scheduler = RequestScheduler(limits=limits)
+    # A cache of its own: fake-server tracks never reach the app's (possibly shared Redis) cache
+    cache = MemoryCache()
+    pools = None
+    if flow == "pool":
+        # Warm the pools up front, as the background refresher would have; not part of the measured run
+        pools = TrackPools(path=None)
+        client = AsyncSpotify(FakeAuth(), base_url=server.base_url, scheduler=scheduler)
+        run_async(PoolRefresher(pools, client, moody_core.MOOD_SETTINGS, moody_core.fetch_pool_tracks).refresh())
+    server.reset()
+    started = time.perf_counter()
+    # The pipeline prints per-playlist progress; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        if flow == "sync":
+            results = _run_sync_users(server.base_url, scheduler, cache, users, playlists)
+        else:
+            results = run_async(_run_async_users(flow, server.base_url, scheduler, cache, users, playlists, pools))
+    seconds = time.perf_counter() - started
+    latencies = np.array([latency for latency, _ in results])
+    succeeded = sum(ok for _, ok in results)
+    p50, p95, p99 = np.quantile(latencies, (0.5, 0.95, 0.99)) if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        "flow": flow,
+        "users": users,
+        "playlists": len(results),
+        "succeeded": succeeded,
+        "seconds": seconds,
+        "playlists_per_second": succeeded / seconds if seconds else 0.0,
+        "p50_ms": p50 * 1000,
+        "p95_ms": p95 * 1000,
+        "p99_ms": p99 * 1000,
+        "api_calls": dict(server.requests),
+        "statuses": dict(server.statuses),
+        "api_calls_per_playlist": sum(server.requests.values()) / max(1, succeeded),
+    }
+
+def print_report(report):
+    print(f"{report['flow']}: {report['succeeded']}/{report['playlists']} playlists by {report['users']} users "
+          f"in {report['seconds']:.2f}s ({report['playlists_per_second']:.1f} playlists/s)")
+    print(f"  latency p50 {report['p50_ms']:.0f} ms, p95 {report['p95_ms']:.0f} ms, p99 {report['p99_ms']:.0f} ms")
+    per_endpoint = ", ".join(f"{name} {n / max(1, report['succeeded']):.2f}" for name, n in sorted(report["api_calls"].items()))
+    print(f"  API calls per playlist: {report['api_calls_per_playlist']:.2f} ({per_endpoint})")
+    print(f"  server statuses: {', '.join(f'{status} ×{n}' for status, n in sorted(report['statuses'].items()))}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Moody load test against a local fake Spotify API")
+    parser.add_argument("--flow", choices=["cli", "sync", "app", "pool", "all"], default="all")
+    parser.add_argument("--users", type=int, default=10, help="concurrent synthetic users")
+    parser.add_argument("--playlists", type=int, default=3, help="playlists per user")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="± latency jitter in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 503")
+    parser.add_argument("--rate-limit", type=float, default=None, help="server requests/second before 429s")
+    parser.add_argument("--unthrottled", action="store_true", help="lift the client-side RequestScheduler budgets")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = FakeSpotifyServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                               rate_limit=args.rate_limit, seed=args.seed)
+    server.start()
+    try:
+        for flow in (["cli", "sync", "app", "pool"] if args.flow == "all" else [args.flow]):
+            print_report(run_load(server, flow, args.users, args.playlists, args.unthrottled))
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
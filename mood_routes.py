@@ -0,0 +1,73 @@
+import json
+import os
+import threading
+from bisect import bisect_right
+
+# Sentiment fallback: a compound score below a route's bound goes to that route's
+# mood; the single route without a bound catches everything above the last one.
+DEFAULT_ROUTES = [
+    {"mood": "sad", "below": -0.5},
+    {"mood": "mellow", "below": -0.1},
+    {"mood": "happy", "below": 0.6},
+    {"mood": "hyped"},
+]
+
+class MoodRouter:
+    """Sorted threshold table mapping compound sentiment scores to moods.
+
+    Lookups are a binary search over the bounds, so any number of moods route in
+    O(log n); a mood may own several disjoint score ranges.
+    """
+
+    def __init__(self, routes=DEFAULT_ROUTES):
+        bounded = sorted((r for r in routes if r.get("below") is not None), key=lambda r: r["below"])
+        open_ended = [r for r in routes if r.get("below") is None]
+        if len(open_ended) != 1:
+            raise ValueError("exactly one mood route must have no 'below' bound")
+        self.thresholds = [float(r["below"]) for r in bounded]
+        if len(set(self.thresholds)) != len(self.thresholds):
+            raise ValueError("mood route bounds must be distinct")
+        self.route_moods = [r["mood"] for r in bounded] + [open_ended[0]["mood"]]
+        self.moods = list(dict.fromkeys(self.route_moods))
+
+    def route(self, score):
+        """Return the mood for one compound score."""
+        return self.route_moods[bisect_right(self.thresholds, score)]
+
+    def route_ids(self, scores, moods):
+        """Vectorized route: returns uint8 indices into moods for an array of scores."""
+        # numpy is only needed for batches; scalar routing stays import-free for CLI startup
+        import numpy as np
+        remap = np.array([moods.index(mood) for mood in self.route_moods], dtype=np.uint8)
+        return remap[np.searchsorted(self.thresholds, scores, side="right")]
+
+    def check(self, known_moods):
+        """Raise ValueError if the table routes to a mood missing from known_moods."""
+        unknown = [mood for mood in self.moods if mood not in known_moods]
+        if unknown:
+            raise ValueError(f"mood routes use moods without settings: {', '.join(unknown)}")
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a table from JSON: {"routes": [{"mood": ..., "below": ...}, ...]}."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["routes"])
+
+def load_router(path=None):
+    """Load the table named by MOODY_MOOD_ROUTES, or the built-in four-mood table."""
+    path = path or os.getenv("MOODY_MOOD_ROUTES")
+    if not path:
+        return MoodRouter()
+    return MoodRouter.from_file(path)
+
+_default_router = None
+_default_router_lock = threading.Lock()
+
+def default_router():
+    """Return the process-wide mood router, loading it on first use."""
+    global _default_router
+    if _default_router is None:
+        with _default_router_lock:
+            if _default_router is None:
+                _default_router = load_router()
+    return _default_router
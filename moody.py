@@ -1,9 +1,19 @@
+import argparse
+import contextlib
+import importlib
+import json
 import os
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from dotenv import load_dotenv
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from keywords import KeywordMatcher
+from mood_routes import default_router
+from timings import get_timings, span
+
+# spotipy, aiohttp, numpy and VADER are imported where they're used, so the CLI
+# reaches its prompt first; main() loads them in the background while the user types.
+WARM_UP_MODULES = ("async_spotify", "playlist_writer", "seed_validation", "spotify_cache", "track_index")
 
 # Load environment variables
 load_dotenv()
@@ -39,68 +49,124 @@ MOOD_SETTINGS = {
         "search_terms": ["party songs", "energetic music", "workout"]
     }
 }
+MOODS = list(MOOD_SETTINGS)
+KEYWORD_MATCHER = KeywordMatcher({mood: config["keywords"] for mood, config in MOOD_SETTINGS.items()})
+MOOD_ROUTER = default_router()
+MOOD_ROUTER.check(MOOD_SETTINGS)
+
+# Fallback search concurrency; the request rate itself is capped by the RequestScheduler
+SEARCH_WORKERS = 4
+# Playlists created at once in batch mode, under the same scheduler limits
+BATCH_CONCURRENCY = 4
+
+def keyword_mood(text_lower):
+    """Return the first mood whose keywords appear in the lowercased text, or None."""
+    return KEYWORD_MATCHER.match(text_lower)
 
 def analyze_mood(text):
     """Analyze text input to determine mood using keywords and sentiment analysis."""
-    analyzer = SentimentIntensityAnalyzer()
-    sentiment = analyzer.polarity_scores(text)["compound"]
-    text_lower = text.lower()
-    
-    for mood, config in MOOD_SETTINGS.items():
-        if any(keyword in text_lower for keyword in config["keywords"]):
-            return mood, config
-    
-    if sentiment < -0.5:
-        return "sad", MOOD_SETTINGS["sad"]
-    elif sentiment < -0.1:
-        return "mellow", MOOD_SETTINGS["mellow"]
-    elif sentiment < 0.6:
-        return "happy", MOOD_SETTINGS["happy"]
-    else:
-        return "hyped", MOOD_SETTINGS["hyped"]
+    from sentiment import memo_score
+    text_key, sentiment = memo_score(text)
+    mood = keyword_mood(text_key.lower()) or MOOD_ROUTER.route(sentiment)
+    return mood, MOOD_SETTINGS[mood]
 
-def initialize_spotify_client():
-    """Initialize and return authenticated Spotify client."""
+def analyze_moods(texts):
+    """Classify many texts at once; returns (mood ids indexing MOODS, compound scores) arrays."""
+    from sentiment import classify_texts
+    return classify_texts(texts, keyword_mood, MOODS, MOOD_ROUTER)
+
+def _authenticate(interactive=True):
+    """Return (client, profile); unless interactive, None when login would need the browser."""
+    from spotipy.oauth2 import SpotifyOAuth
+    from rate_limit import scheduled_spotipy
+
+    auth_manager = SpotifyOAuth(
+        client_id=os.getenv("SPOTIPY_CLIENT_ID"),
+        client_secret=os.getenv("SPOTIPY_CLIENT_SECRET"),
+        redirect_uri="http://localhost:8888/callback",
+        scope="playlist-modify-private"
+    )
+    if not interactive and not auth_manager.validate_token(auth_manager.cache_handler.get_cached_token()):
+        return None
+    # Retries and throttling are left to the shared RequestScheduler
+    sp = scheduled_spotipy(auth_manager)
+    return sp, sp.me()
+
+def _warm_up():
+    """Load the VADER lexicon and import the modules the pipeline needs after the prompt."""
+    from sentiment import get_analyzer
+    get_analyzer()
+    for name in WARM_UP_MODULES:
+        importlib.import_module(name)
+
+def initialize_spotify_client(pending=None):
+    """Initialize and return authenticated Spotify client.
+
+    pending is an optional future of a background _authenticate(interactive=False).
+    """
     try:
-        sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-            client_id=os.getenv("SPOTIPY_CLIENT_ID"),
-            client_secret=os.getenv("SPOTIPY_CLIENT_SECRET"),
-            redirect_uri="http://localhost:8888/callback",
-            scope="playlist-modify-private"
-        ))
+        sp, user = (pending.result() if pending else None) or _authenticate()
         print("✅ Authentication successful!")
-        print(f"👤 Logged in as: {sp.me()['display_name']}")
+        print(f"👤 Logged in as: {user['display_name']}")
         return sp
     except Exception as e:
         print(f"❌ Authentication failed: {e}")
         exit()
 
-def get_tracks(sp, mood_config):
-    """Get tracks based on mood configuration using recommendations or fallback search."""
+def track_summary(t):
+    """Reduce a Spotify track object to the fields the playlist pipeline uses."""
+    return { "name": t["name"], "artist": t["artists"][0]["name"], "url": t["external_urls"]["spotify"], "uri": t["uri"] }
+
+def recommendation_params(mood_config):
+    """Recommendation request parameters for a mood."""
+    return {
+        "seed_tracks": mood_config["seed_tracks"],
+        "limit": 15,
+        "target_valence": mood_config["valence"],
+        "target_energy": mood_config["energy"],
+        "min_popularity": 40
+    }
+
+def get_tracks(sp, mood_config, index=None, cache=None):
+    """Get tracks based on mood configuration using recommendations or fallback search.
+
+    With a local TrackIndex, recommendations come from the catalog instead of Spotify.
+    cache defaults to the process-wide recommendation cache.
+    """
+    from spotify_cache import cached_recommendations
+
     track_list = []
     
     try:
-        recommendations = sp.recommendations(
-            seed_tracks=mood_config["seed_tracks"],
-            limit=15,
-            target_valence=mood_config["valence"],
-            target_energy=mood_config["energy"],
-            min_popularity=40
-        )
-        track_list.extend([{ "name": t["name"], "artist": t["artists"][0]["name"], "url": t["external_urls"]["spotify"], "uri": t["uri"] } for t in recommendations["tracks"]])
+        if index is not None:
+            recommendations = index.recommendations(**recommendation_params(mood_config))
+        elif not mood_config["seed_tracks"]:
+            raise ValueError("no valid seed tracks")
+        else:
+            recommendations = cached_recommendations(sp, cache, **recommendation_params(mood_config))
+        track_list.extend([track_summary(t) for t in recommendations["tracks"]])
     except Exception as e:
         print(f"⚠️ Recommendation API error: {e}")
-        for term in mood_config["search_terms"]:
-            try:
-                results = sp.search(q=term, type="track", limit=5, market="US")
-                track_list.extend([{ "name": t["name"], "artist": t["artists"][0]["name"], "url": t["external_urls"]["spotify"], "uri": t["uri"] } for t in results["tracks"]["items"]])
-                time.sleep(0.2)
-            except Exception as e:
-                print(f"⚠️ Search failed for '{term}': {e}")
+        track_list.extend(search_tracks(sp, mood_config["search_terms"]))
     return list({t["uri"]: t for t in track_list}.values())
 
+def search_tracks(sp, terms):
+    """Run the fallback searches concurrently, returning tracks in term order."""
+    def search(term):
+        try:
+            results = sp.search(q=term, type="track", limit=5, market="US")
+            return [track_summary(t) for t in results["tracks"]["items"]]
+        except Exception as e:
+            print(f"⚠️ Search failed for '{term}': {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(SEARCH_WORKERS, len(terms)))) as pool:
+        return [track for tracks in pool.map(search, terms) for track in tracks]
+
 def create_playlist(sp, mood, text, tracks):
     """Create a Spotify playlist with the given tracks."""
+    from playlist_writer import add_items_bulk_sync
+
     try:
         user_id = sp.current_user()["id"]
         playlist = sp.user_playlist_create(
@@ -110,27 +176,242 @@ def create_playlist(sp, mood, text, tracks):
             description=f"Auto-generated playlist for when you feel {mood} ({text})"
         )
         if tracks:
-            sp.playlist_add_items(playlist["id"], [t["uri"] for t in tracks[:100]])
+            report = add_items_bulk_sync(sp, playlist["id"], [t["uri"] for t in tracks])
+            print(f"📦 Added {report['items']} tracks in {report['batches']} batches ({report['items_per_second']:.0f} tracks/s)")
+            print(f"\n✅ Playlist created: {playlist['external_urls']['spotify']}")
+            return playlist
+        print("⚠️ No tracks found.")
+    except Exception as e:
+        print(f"❌ Failed to create playlist: {e}")
+
+async def get_tracks_async(client, mood_config, index=None, cache=None):
+    """get_tracks for an AsyncSpotify client; fallback searches run concurrently on the event loop."""
+    import asyncio
+    from spotify_cache import cached_recommendations_async
+
+    track_list = []
+    
+    try:
+        if index is not None:
+            recommendations = index.recommendations(**recommendation_params(mood_config))
+        elif not mood_config["seed_tracks"]:
+            raise ValueError("no valid seed tracks")
+        else:
+            recommendations = await cached_recommendations_async(client, cache, **recommendation_params(mood_config))
+        track_list.extend([track_summary(t) for t in recommendations["tracks"]])
+    except Exception as e:
+        print(f"⚠️ Recommendation API error: {e}")
+        terms = mood_config["search_terms"]
+        results = await asyncio.gather(
+            *(client.search(q=term, type="track", limit=5, market="US") for term in terms),
+            return_exceptions=True
+        )
+        for term, result in zip(terms, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Search failed for '{term}': {result}")
+                continue
+            track_list.extend([track_summary(t) for t in result["tracks"]["items"]])
+    return list({t["uri"]: t for t in track_list}.values())
+
+async def _new_playlist_async(client, user_id, mood, text, tracks):
+    """Create the playlist and add tracks to it; returns (playlist, add report). API errors propagate."""
+    from playlist_writer import add_items_bulk
+
+    playlist = await client.user_playlist_create(
+        user=user_id,
+        name=f"Moody: {mood.capitalize()} Vibes",
+        public=False,
+        description=f"Auto-generated playlist for when you feel {mood} ({text})"
+    )
+    report = await add_items_bulk(client, playlist["id"], [t["uri"] for t in tracks]) if tracks else None
+    return playlist, report
+
+async def create_playlist_async(client, mood, text, tracks):
+    """create_playlist for an AsyncSpotify client."""
+    try:
+        user_id = (await client.current_user())["id"]
+        playlist, report = await _new_playlist_async(client, user_id, mood, text, tracks)
+        if tracks:
+            print(f"📦 Added {report['items']} tracks in {report['batches']} batches ({report['items_per_second']:.0f} tracks/s)")
             print(f"\n✅ Playlist created: {playlist['external_urls']['spotify']}")
             return playlist
         print("⚠️ No tracks found.")
     except Exception as e:
         print(f"❌ Failed to create playlist: {e}")
 
-def main():
+def parse_prompt(line):
+    """Return the batch record for one JSONL line, with "prompt": None and an "error" if it has no prompt."""
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return {"prompt": None, "error": f"invalid JSON: {e}"}
+    if isinstance(record, str):
+        return {"prompt": record}
+    if not isinstance(record, dict):
+        return {"prompt": None, "error": f"expected a JSON object or string, got {type(record).__name__}"}
+    if not isinstance(record.get("prompt"), str):
+        return {**record, "prompt": None, "error": 'missing "prompt" string'}
+    return record
+
+def read_prompts(path):
+    """Read batch records from JSONL: {"prompt": ..., any other fields} objects or bare JSON strings.
+
+    Every record gets its "line" number; a bad line becomes a record without a
+    prompt, so it is reported in the results instead of aborting the batch.
+    """
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        records = []
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                records.append({**parse_prompt(line), "line": number})
+        return records
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+async def generate_batch(client, records, out, concurrency=BATCH_CONCURRENCY, one_per_mood=False, index=None):
+    """Create playlists for many prompts, writing one JSON line per prompt to out as each finishes.
+
+    Prompts are classified together and grouped by mood, so tracks are fetched once
+    per distinct mood; playlist writes run concurrently under the RequestScheduler's
+    limits. With one_per_mood, each mood group shares a single playlist, so the
+    whole run costs a handful of calls per distinct mood.
+    Records whose "prompt" isn't a string get an error line and are skipped.
+    Returns {"prompts", "moods", "playlists", "failed", "rejected"} counts.
+    """
+    import asyncio
+
+    rejected = [row for row, record in enumerate(records) if not isinstance(record.get("prompt"), str)]
+    for row in rejected:
+        out.write(json.dumps({**records[row], "line": records[row].get("line", row + 1), "mood": None, "compound": None,
+                              "tracks": 0, "playlist": None, "error": records[row].get("error", 'missing "prompt" string')}) + "\n")
+    out.flush()
+    valid = [row for row, record in enumerate(records) if isinstance(record.get("prompt"), str)]
+    counts = {"prompts": len(records), "moods": 0, "playlists": 0, "failed": 0, "rejected": len(rejected)}
+    if not valid:
+        return counts
+    mood_ids, row_scores = analyze_moods([records[row]["prompt"] for row in valid])
+    scores = dict(zip(valid, row_scores))
+    groups = {}
+    for row, mood_id in zip(valid, mood_ids):
+        groups.setdefault(MOODS[mood_id], []).append(row)
+    user_id = (await client.current_user())["id"]
+    fetched = await asyncio.gather(*(get_tracks_async(client, MOOD_SETTINGS[mood], index=index) for mood in groups))
+    tracks_by_mood = dict(zip(groups, fetched))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def make(mood, rows):
+        tracks = tracks_by_mood[mood]
+        if not tracks:
+            return mood, rows, None, "no tracks found"
+        text = records[rows[0]]["prompt"] if len(rows) == 1 else f"{len(rows)} prompts"
+        async with semaphore:
+            try:
+                playlist, _ = await _new_playlist_async(client, user_id, mood, text, tracks)
+            except Exception as e:
+                return mood, rows, None, str(e)
+        return mood, rows, playlist["external_urls"]["spotify"], None
+
+    if one_per_mood:
+        jobs = [make(mood, rows) for mood, rows in groups.items()]
+    else:
+        jobs = [make(MOODS[mood_id], [row]) for row, mood_id in zip(valid, mood_ids)]
+    counts["moods"] = len(groups)
+    for job in asyncio.as_completed(jobs):
+        mood, rows, url, error = await job
+        counts["failed" if error else "playlists"] += 1
+        for row in rows:
+            out.write(json.dumps({**records[row], "line": records[row].get("line", row + 1), "mood": mood, "compound": float(scores[row]),
+                                  "tracks": len(tracks_by_mood[mood]), "playlist": url, "error": error}) + "\n")
+        out.flush()
+    return counts
+
+def validate_seeds(client):
+    """Drop dead seeds from MOOD_SETTINGS, reusing the validity results saved by earlier runs."""
+    from async_spotify import run_async
+    from seed_validation import seed_cache_from_env, validate_mood_seeds
+
+    seeds = seed_cache_from_env()
+    removed = run_async(validate_mood_seeds(client, MOOD_SETTINGS, seeds))
+    seeds.save()
+    return removed
+
+def run_batch(path, output="-", concurrency=BATCH_CONCURRENCY, one_per_mood=False):
+    """Batch mode entry point: JSONL results go to output, progress messages to stderr."""
+    out = sys.stdout if output == "-" else open(output, "w", encoding="utf-8")
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            records = read_prompts(path)
+            sp = initialize_spotify_client()
+            from async_spotify import AsyncSpotify, run_async
+            from track_index import load_track_index
+
+            client = AsyncSpotify(sp.auth_manager)
+            index = load_track_index()
+            if index is None:
+                validate_seeds(client)
+            started = time.perf_counter()
+            counts = run_async(generate_batch(client, records, out, concurrency, one_per_mood, index=index))
+            calls = sum(client.calls.values()) - client.calls["token"]
+            print(f"✅ {counts['prompts']} prompts, {counts['moods']} moods: {counts['playlists']} playlists created, "
+                  f"{counts['failed']} failed, {counts['rejected']} bad input lines in {time.perf_counter() - started:.1f}s ({calls} Spotify API calls)")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def main(argv=None):
     """Run the Moody Playlist Generator."""
-    sp = initialize_spotify_client()
+    parser = argparse.ArgumentParser(description="Moody Playlist Generator")
+    parser.add_argument("--batch", metavar="FILE", help="create playlists for every prompt in a JSONL file ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="batch results as JSONL (default: stdout)")
+    parser.add_argument("--concurrency", type=positive_int, default=BATCH_CONCURRENCY, help="playlists created at once in batch mode")
+    parser.add_argument("--one-per-mood", action="store_true", help="in batch mode, one shared playlist per mood")
+    args = parser.parse_args(argv)
+    if args.batch:
+        run_batch(args.batch, args.output, args.concurrency, args.one_per_mood)
+        return
+
+    # Log in and load the lexicon while the user is typing
+    startup = ThreadPoolExecutor(max_workers=2, thread_name_prefix="moody-startup")
+    startup.submit(_warm_up)
+    pending_auth = startup.submit(_authenticate, interactive=False)
+    startup.shutdown(wait=False)
     text = input("\nHow are you feeling today? ")
-    mood, mood_config = analyze_mood(text)
+    with span("client_init"):
+        sp = initialize_spotify_client(pending_auth)
+    with span("analyze_mood"):
+        mood, mood_config = analyze_mood(text)
     print(f"\n🎵 Detected mood: {mood.capitalize()}")
-    tracks = get_tracks(sp, mood_config)
+    from async_spotify import AsyncSpotify, run_async
+    from track_index import load_track_index
+
+    client = AsyncSpotify(sp.auth_manager)
+    # A local index picks tracks by audio features, so recommendation seeds don't matter
+    index = load_track_index()
+    if index is None:
+        with span("validate_seeds"):
+            validate_seeds(client)
+    with span("get_tracks"):
+        tracks = run_async(get_tracks_async(client, mood_config, index=index))
     if tracks:
         print(f"\n🎧 Playlist preview:")
         for i, t in enumerate(tracks[:6]):
             print(f"{i+1}. {t['name']} by {t['artist']}\n   {t['url']}")
-        create_playlist(sp, mood, text, tracks)
+        with span("create_playlist"):
+            run_async(create_playlist_async(client, mood, text, tracks))
     else:
         print("⚠️ No suitable tracks found.")
+    timings = get_timings()
+    if timings:
+        print(f"\n⏱️ Stage timings:\n{timings.prometheus_text()}")
 
 if __name__ == "__main__":
     main()
@@ -1,258 +1,114 @@
-<<<<<<< HEAD
+import time
+from collections import Counter, deque
+import pandas as pd
 import streamlit as st
 from spotipy.oauth2 import SpotifyOAuth
-import spotipy
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from dotenv import load_dotenv
-import os
+from async_spotify import AsyncSpotify, iter_async, run_async, submit_async
+from history_store import history_store_from_env
+from moody_core import MOOD_SETTINGS, analyze_mood, fetch_pool_tracks, save_playlist, stream_tracks
+from preview_cache import preview_cache_from_env
+from seed_validation import validate_mood_seeds
+from timings import get_timings, span
+from track_index import load_track_index
+from track_pools import PoolRefresher, pool_size_from_env, track_pools_from_env
 
 # Load environment variables
 load_dotenv()
 
-# --- MOOD CONFIGURATION ---
-MOOD_KEYWORDS = {
-    "sad": ["rough", "awful", "terrible", "depressed", "sad", "cry", "grumpy"],
-    "mellow": ["meh", "okay", "fine", "chill", "relax", "peaceful", "tired"],
-    "happy": ["joy", "happy", "awesome", "great", "good"],
-    "hyped": ["excited", "pumped", "amazing", "best day", "wow"]
-}
-
-MOOD_SETTINGS = {
-    "sad": {
-        "keywords": ["melancholic", "sad", "heartbreak"],
-        "valence_range": (0.0, 0.4),
-        "energy_range": (0.1, 0.5),
-        "seed_genres": ["blues", "acoustic"],
-        "color": "#3498db",
-        "emoji": "😢"
-    },
-    "mellow": {
-        "keywords": ["chill", "lo-fi", "calm"],
-        "valence_range": (0.3, 0.6),
-        "energy_range": (0.3, 0.6),
-        "seed_genres": ["chill", "ambient"],
-        "color": "#2ecc71",
-        "emoji": "😌"
-    },
-    "happy": {
-        "keywords": ["happy", "uplifting", "joyful"],
-        "valence_range": (0.6, 0.8),
-        "energy_range": (0.5, 0.8),
-        "seed_genres": ["pop", "indie"],
-        "color": "#f1c40f",
-        "emoji": "😊"
-    },
-    "hyped": {
-        "keywords": ["energy", "workout", "party"],
-        "valence_range": (0.8, 1.0),
-        "energy_range": (0.7, 1.0),
-        "seed_genres": ["edm", "dance"],
-        "color": "#e74c3c",
-        "emoji": "🤩"
-    }
-}
-
-# --- CORE FUNCTIONS ---
-def analyze_mood(text):
-    analyzer = SentimentIntensityAnalyzer()
-    sentiment = analyzer.polarity_scores(text)["compound"]
-    text_lower = text.lower()
-    
-    # Keyword matching first
-    for mood, keywords in MOOD_KEYWORDS.items():
-        if any(keyword in text_lower for keyword in keywords):
-            return mood, MOOD_SETTINGS[mood]
-    
-    # Sentiment fallback
-    if sentiment < -0.5:
-        return "sad", MOOD_SETTINGS["sad"]
-    elif sentiment < -0.1:
-        return "mellow", MOOD_SETTINGS["mellow"]
-    elif sentiment < 0.6:
-        return "happy", MOOD_SETTINGS["happy"]
-    return "hyped", MOOD_SETTINGS["hyped"]
-
-def get_spotify_client():
-    try:
-        return spotipy.Spotify(auth_manager=SpotifyOAuth(
-            scope="playlist-modify-private",
-            redirect_uri="http://localhost:8888/callback"
-        ))
-    except Exception as e:
-        st.error(f"❌ Spotify login failed: {e}")
-        return None
-
-def apply_mood_theme(mood):
-    """Apply dynamic styling based on mood"""
-    st.markdown(f"""
-        <style>
-            .stTextInput input {{ border-color: {MOOD_SETTINGS[mood]['color']} }}
-            .stButton>button {{ 
-                background-color: {MOOD_SETTINGS[mood]['color']};
-                color: white;
-            }}
-            .mood-header {{ color: {MOOD_SETTINGS[mood]['color']} }}
-        </style>
-    """, unsafe_allow_html=True)
-
-# --- STREAMLIT UI ---
-st.set_page_config(page_title="Moody Playlist Generator", page_icon="🎧")
-
-# Sidebar for history
-if 'history' not in st.session_state:
-    st.session_state.history = []
-
-# Main app
-st.title(f"{MOOD_SETTINGS['happy']['emoji']} Moody Playlist Generator")
-user_input = st.text_input("How are you feeling today?", "I'm feeling...")
-
-if st.button("Create Playlist"):
-    if not user_input or "I'm feeling..." in user_input:
-        st.warning("Please share your mood!")
-    else:
-        mood, mood_config = analyze_mood(user_input)
-        st.session_state.history.append((mood, user_input))
-        
-        # Apply mood-specific styling
-        apply_mood_theme(mood)
-        st.success(f"Detected mood: **{mood_config['emoji']} {mood.upper()}**")
-        
-        sp = get_spotify_client()
-        if sp:
-            with st.spinner(f"🎵 Finding {mood} songs..."):
-                try:
-                    # Primary recommendation method
-                    rec = sp.recommendations(
-                        seed_genres=mood_config["seed_genres"][:2],
-                        limit=15,
-                        target_valence=sum(mood_config["valence_range"]) / 2,
-                        target_energy=sum(mood_config["energy_range"]) / 2,
-                        min_valence=mood_config["valence_range"][0],
-                        max_valence=mood_config["valence_range"][1],
-                        min_energy=mood_config["energy_range"][0],
-                        max_energy=mood_config["energy_range"][1]
-                    )
-                    
-                    # Display results
-                    st.subheader(f"Your {mood} playlist {mood_config['emoji']}:")
-                    cols = st.columns(2)
-                    
-                    for i, track in enumerate(rec["tracks"][:6]):
-                        with cols[i % 2]:
-                            st.write(f"#### {i+1}. {track['name']}")
-                            st.write(f"**Artist**: {track['artists'][0]['name']}")
-                            if track['preview_url']:
-                                st.audio(track['preview_url'], format="audio/mp3")
-                            st.markdown(f"[Open in Spotify]({track['external_urls']['spotify']})")
-                            st.divider()
-                    
-                    # Save playlist
-                    try:
-                        playlist = sp.user_playlist_create(
-                            user=sp.me()["id"],
-                            name=f"{mood_config['emoji']} Moody: {mood.capitalize()} Vibes",
-                            public=False,
-                            description=f"Auto-generated based on mood: '{user_input}'"
-                        )
-                        sp.playlist_add_items(playlist["id"], [t["uri"] for t in rec["tracks"][:30]])
-                        st.success(f"✅ Playlist saved to your Spotify!")
-                        st.markdown(f"[🔗 Open Playlist]({playlist['external_urls']['spotify']})", unsafe_allow_html=True)
-                    except Exception as e:
-                        st.error(f"❌ Couldn't save playlist: {str(e)}")
-                
-                except Exception as e:
-                    st.warning("⚠️ Using fallback search method...")
-                    try:
-                        results = sp.search(q=f"{mood} music", type="track", limit=15)
-                        st.subheader(f"Your {mood} playlist (fallback):")
-                        for i, track in enumerate(results["tracks"]["items"][:6]):
-                            st.write(f"{i+1}. [{track['name']}]({track['external_urls']['spotify']}) by {track['artists'][0]['name']}")
-                    except Exception as e:
-                        st.error(f"❌ Fallback failed: {str(e)}")
-
-# History sidebar
-with st.sidebar:
-    st.subheader("Your Mood History")
-    for mood, text in reversed(st.session_state.history[-5:]):
-        st.write(f"{MOOD_SETTINGS[mood]['emoji']} {text} → *{mood}*")# --- MOOD CONFIGURATION ---
-MOOD_KEYWORDS = {
-    "sad": ["rough", "awful", "terrible", "depressed", "sad", "cry", "grumpy"],
-    "mellow": ["meh", "okay", "fine", "chill", "relax", "peaceful", "tired"],
-    "happy": ["joy", "happy", "awesome", "great", "good"],
-    "hyped": ["excited", "pumped", "amazing", "best day", "wow"]
-}
-
-MOOD_SETTINGS = {
-    "sad": {
-        "keywords": ["melancholic", "sad", "heartbreak"],
-        "valence_range": (0.0, 0.4),
-        "energy_range": (0.1, 0.5),
-        "seed_genres": ["blues", "acoustic"],
-        "color": "#3498db",
-        "emoji": "😢"
-    },
-    "mellow": {
-        "keywords": ["chill", "lo-fi", "calm"],
-        "valence_range": (0.3, 0.6),
-        "energy_range": (0.3, 0.6),
-        "seed_genres": ["chill", "ambient"],
-        "color": "#2ecc71",
-        "emoji": "😌"
-    },
-    "happy": {
-        "keywords": ["happy", "uplifting", "joyful"],
-        "valence_range": (0.6, 0.8),
-        "energy_range": (0.5, 0.8),
-        "seed_genres": ["pop", "indie"],
-        "color": "#f1c40f",
-        "emoji": "😊"
-    },
-    "hyped": {
-        "keywords": ["energy", "workout", "party"],
-        "valence_range": (0.8, 1.0),
-        "energy_range": (0.7, 1.0),
-        "seed_genres": ["edm", "dance"],
-        "color": "#e74c3c",
-        "emoji": "🤩"
-    }
-}
-
-# --- CORE FUNCTIONS ---
-def analyze_mood(text):
-    analyzer = SentimentIntensityAnalyzer()
-    sentiment = analyzer.polarity_scores(text)["compound"]
-    text_lower = text.lower()
-    
-    # Keyword matching first
-    for mood, keywords in MOOD_KEYWORDS.items():
-        if any(keyword in text_lower for keyword in keywords):
-            return mood, MOOD_SETTINGS[mood]
-    
-    # Sentiment fallback
-    if sentiment < -0.5:
-        return "sad", MOOD_SETTINGS["sad"]
-    elif sentiment < -0.1:
-        return "mellow", MOOD_SETTINGS["mellow"]
-    elif sentiment < 0.6:
-        return "happy", MOOD_SETTINGS["happy"]
-    return "hyped", MOOD_SETTINGS["hyped"]
+# Sidebar history entries kept per session; older ones stay in the store
+HISTORY_VIEW_SIZE = 5
+TREND_DAYS = 30
 
 def get_spotify_client():
-    try:
-        return spotipy.Spotify(auth_manager=SpotifyOAuth(
-            scope="playlist-modify-private",
-            redirect_uri="http://localhost:8888/callback"
-        ))
-    except Exception as e:
-        st.error(f"❌ Spotify login failed: {e}")
-        return None
+    """Return this session's Spotify client and profile, logging in once per session."""
+    if "spotify" not in st.session_state:
+        try:
+            client = AsyncSpotify(SpotifyOAuth(
+                scope="playlist-modify-private",
+                redirect_uri="http://localhost:8888/callback"
+            ))
+            st.session_state.spotify = {"client": client, "user": run_async(client.me())}
+            validate_seeds(client)
+            start_pool_refresher(client)
+        except Exception as e:
+            st.error(f"❌ Spotify login failed: {e}")
+            return None
+    return st.session_state.spotify
+
+@st.cache_resource
+def validate_seeds(_client):
+    """Drop dead seed genres from MOOD_SETTINGS once per server process"""
+    return run_async(validate_mood_seeds(_client, MOOD_SETTINGS))
+
+@st.cache_resource
+def get_track_pools():
+    """Warm per-mood candidate pools shared by all sessions, loaded from disk"""
+    return track_pools_from_env()
+
+@st.cache_resource
+def start_pool_refresher(_client):
+    """Keep the mood pools fresh in the background once per server process"""
+    # Its own client (same login), so background calls don't show up in a user's click counts
+    client = AsyncSpotify(_client.auth_manager, base_url=_client.base_url)
+    return PoolRefresher(get_track_pools(), client, MOOD_SETTINGS, fetch_pool_tracks, pool_size_from_env()).start()
+
+@st.cache_resource
+def get_track_index():
+    """Local track catalog shared by all sessions, if MOODY_TRACK_INDEX is set."""
+    return load_track_index()
+
+@st.cache_resource
+def get_preview_cache():
+    """Disk cache of preview MP3s shared by all sessions"""
+    return preview_cache_from_env()
+
+@st.cache_resource
+def get_history_store():
+    """Persistent mood history shared by all sessions"""
+    return history_store_from_env()
+
+def history_user():
+    """History key: the Spotify user id once logged in, else None (history stays in this session)"""
+    spotify = st.session_state.get("spotify")
+    return spotify["user"]["id"] if spotify else None
+
+def history_view(user):
+    """This session's bounded view of the user's latest entries, oldest first"""
+    if "history" not in st.session_state or st.session_state.get("history_user") != user:
+        st.session_state.history_user = user
+        recent = get_history_store().recent(user, HISTORY_VIEW_SIZE) if user else []
+        st.session_state.history = deque(reversed(recent), maxlen=HISTORY_VIEW_SIZE)
+    return st.session_state.history
+
+def record_history(user, mood, text):
+    """Persist the entry for a logged-in user; without one it only goes to this session's view"""
+    # Load the view first: a reload after the append would already include the new entry
+    view = history_view(user)
+    ts = get_history_store().append(user, mood, text) if user else time.time()
+    view.append((ts, mood, text))
+
+def show_mood_trends(user):
+    """Charts from the store's running aggregates; cost doesn't grow with history length"""
+    store = get_history_store()
+    moods = list(MOOD_SETTINGS)
+    st.write("**All time**")
+    st.bar_chart(pd.Series(store.totals(user)).reindex(moods, fill_value=0))
+    st.write(f"**Last {TREND_DAYS} days**")
+    daily = store.daily_counts(user, days=TREND_DAYS)
+    st.area_chart(pd.DataFrame([counts for _, counts in daily], columns=moods,
+                               index=pd.to_datetime([day for day, _ in daily], unit="s")).fillna(0))
+    st.write("**What comes next** (rows: previous mood)")
+    transitions = store.transitions(user)
+    st.dataframe(pd.DataFrame([[transitions.get((prev, nxt), 0) for nxt in moods] for prev in moods],
+                              index=moods, columns=moods))
 
 def apply_mood_theme(mood):
     """Apply dynamic styling based on mood"""
     st.markdown(f"""
         <style>
             .stTextInput input {{ border-color: {MOOD_SETTINGS[mood]['color']} }}
-            .stButton>button {{ 
+            .stButton>button {{
                 background-color: {MOOD_SETTINGS[mood]['color']};
                 color: white;
             }}
@@ -260,755 +116,144 @@ def apply_mood_theme(mood):
         </style>
     """, unsafe_allow_html=True)
 
-# --- STREAMLIT UI ---
-st.set_page_config(page_title="Moody Playlist Generator", page_icon="🎧")
-
-# Sidebar for history
-if 'history' not in st.session_state:
-    st.session_state.history = []
-
-# Main app
-st.title(f"{MOOD_SETTINGS['happy']['emoji']} Moody Playlist Generator")
-user_input = st.text_input("How are you feeling today?", "I'm feeling...")
-
-if st.button("Create Playlist"):
-    if not user_input or "I'm feeling..." in user_input:
-        st.warning("Please share your mood!")
-    else:
-        mood, mood_config = analyze_mood(user_input)
-        st.session_state.history.append((mood, user_input))
-        
-        # Apply mood-specific styling
-        apply_mood_theme(mood)
-        st.success(f"Detected mood: **{mood_config['emoji']} {mood.upper()}**")
-        
-        sp = get_spotify_client()
-        if sp:
-            with st.spinner(f"🎵 Finding {mood} songs..."):
-                try:
-                    # Primary recommendation method
-                    rec = sp.recommendations(
-                        seed_genres=mood_config["seed_genres"][:2],
-                        limit=15,
-                        target_valence=sum(mood_config["valence_range"]) / 2,
-                        target_energy=sum(mood_config["energy_range"]) / 2,
-                        min_valence=mood_config["valence_range"][0],
-                        max_valence=mood_config["valence_range"][1],
-                        min_energy=mood_config["energy_range"][0],
-                        max_energy=mood_config["energy_range"][1]
-                    )
-                    
-                    # Display results
-                    st.subheader(f"Your {mood} playlist {mood_config['emoji']}:")
-                    cols = st.columns(2)
-                    
-                    for i, track in enumerate(rec["tracks"][:6]):
-                        with cols[i % 2]:
-                            st.write(f"#### {i+1}. {track['name']}")
-                            st.write(f"**Artist**: {track['artists'][0]['name']}")
-                            if track['preview_url']:
-                                st.audio(track['preview_url'], format="audio/mp3")
-                            st.markdown(f"[Open in Spotify]({track['external_urls']['spotify']})")
-                            st.divider()
-                    
-                    # Save playlist
-                    try:
-                        playlist = sp.user_playlist_create(
-                            user=sp.me()["id"],
-                            name=f"{mood_config['emoji']} Moody: {mood.capitalize()} Vibes",
-                            public=False,
-                            description=f"Auto-generated based on mood: '{user_input}'"
-                        )
-                        sp.playlist_add_items(playlist["id"], [t["uri"] for t in rec["tracks"][:30]])
-                        st.success(f"✅ Playlist saved to your Spotify!")
-                        st.markdown(f"[🔗 Open Playlist]({playlist['external_urls']['spotify']})", unsafe_allow_html=True)
-                    except Exception as e:
-                        st.error(f"❌ Couldn't save playlist: {str(e)}")
-                
-                except Exception as e:
-                    st.warning("⚠️ Using fallback search method...")
-                    try:
-                        results = sp.search(q=f"{mood} music", type="track", limit=15)
-                        st.subheader(f"Your {mood} playlist (fallback):")
-                        for i, track in enumerate(results["tracks"]["items"][:6]):
-                            st.write(f"{i+1}. [{track['name']}]({track['external_urls']['spotify']}) by {track['artists'][0]['name']}")
-                    except Exception as e:
-                        st.error(f"❌ Fallback failed: {str(e)}")
-
-# History sidebar
-with st.sidebar:
-    st.subheader("Your Mood History")
-    for mood, text in reversed(st.session_state.history[-5:]):
-        st.write(f"{MOOD_SETTINGS[mood]['emoji']} {text} → *{mood}*")# --- MOOD CONFIGURATION ---
-MOOD_KEYWORDS = {
-    "sad": ["rough", "awful", "terrible", "depressed", "sad", "cry", "grumpy"],
-    "mellow": ["meh", "okay", "fine", "chill", "relax", "peaceful", "tired"],
-    "happy": ["joy", "happy", "awesome", "great", "good"],
-    "hyped": ["excited", "pumped", "amazing", "best day", "wow"]
-}
-
-MOOD_SETTINGS = {
-    "sad": {
-        "keywords": ["melancholic", "sad", "heartbreak"],
-        "valence_range": (0.0, 0.4),
-        "energy_range": (0.1, 0.5),
-        "seed_genres": ["blues", "acoustic"],
-        "color": "#3498db",
-        "emoji": "😢"
-    },
-    "mellow": {
-        "keywords": ["chill", "lo-fi", "calm"],
-        "valence_range": (0.3, 0.6),
-        "energy_range": (0.3, 0.6),
-        "seed_genres": ["chill", "ambient"],
-        "color": "#2ecc71",
-        "emoji": "😌"
-    },
-    "happy": {
-        "keywords": ["happy", "uplifting", "joyful"],
-        "valence_range": (0.6, 0.8),
-        "energy_range": (0.5, 0.8),
-        "seed_genres": ["pop", "indie"],
-        "color": "#f1c40f",
-        "emoji": "😊"
-    },
-    "hyped": {
-        "keywords": ["energy", "workout", "party"],
-        "valence_range": (0.8, 1.0),
-        "energy_range": (0.7, 1.0),
-        "seed_genres": ["edm", "dance"],
-        "color": "#e74c3c",
-        "emoji": "🤩"
-    }
-}
-
-# --- CORE FUNCTIONS ---
-def analyze_mood(text):
-    analyzer = SentimentIntensityAnalyzer()
-    sentiment = analyzer.polarity_scores(text)["compound"]
-    text_lower = text.lower()
-    
-    # Keyword matching first
-    for mood, keywords in MOOD_KEYWORDS.items():
-        if any(keyword in text_lower for keyword in keywords):
-            return mood, MOOD_SETTINGS[mood]
-    
-    # Sentiment fallback
-    if sentiment < -0.5:
-        return "sad", MOOD_SETTINGS["sad"]
-    elif sentiment < -0.1:
-        return "mellow", MOOD_SETTINGS["mellow"]
-    elif sentiment < 0.6:
-        return "happy", MOOD_SETTINGS["happy"]
-    return "hyped", MOOD_SETTINGS["hyped"]
-
-def get_spotify_client():
+@st.fragment
+def preview_player(track):
+    """Load a track's preview only when asked; reruns just this fragment, not the page"""
+    loaded = st.session_state.setdefault("loaded_previews", set())
+    if track['id'] not in loaded:
+        if not st.button("▶️ Load preview", key=f"preview_{track['id']}"):
+            return
+        loaded.add(track['id'])
     try:
-        return spotipy.Spotify(auth_manager=SpotifyOAuth(
-            scope="playlist-modify-private",
-            redirect_uri="http://localhost:8888/callback"
-        ))
+        st.audio(get_preview_cache().fetch(track['id'], track['preview_url']), format="audio/mp3")
     except Exception as e:
-        st.error(f"❌ Spotify login failed: {e}")
-        return None
-
-def apply_mood_theme(mood):
-    """Apply dynamic styling based on mood"""
-    st.markdown(f"""
-        <style>
-            .stTextInput input {{ border-color: {MOOD_SETTINGS[mood]['color']} }}
-            .stButton>button {{ 
-                background-color: {MOOD_SETTINGS[mood]['color']};
-                color: white;
-            }}
-            .mood-header {{ color: {MOOD_SETTINGS[mood]['color']} }}
-        </style>
-    """, unsafe_allow_html=True)
-
-# --- STREAMLIT UI ---
-st.set_page_config(page_title="Moody Playlist Generator", page_icon="🎧")
-
-# Sidebar for history
-if 'history' not in st.session_state:
-    st.session_state.history = []
-
-# Main app
-st.title(f"{MOOD_SETTINGS['happy']['emoji']} Moody Playlist Generator")
-user_input = st.text_input("How are you feeling today?", "I'm feeling...")
-
-if st.button("Create Playlist"):
-    if not user_input or "I'm feeling..." in user_input:
-        st.warning("Please share your mood!")
-    else:
-        mood, mood_config = analyze_mood(user_input)
-        st.session_state.history.append((mood, user_input))
-        
-        # Apply mood-specific styling
-        apply_mood_theme(mood)
-        st.success(f"Detected mood: **{mood_config['emoji']} {mood.upper()}**")
-        
-        sp = get_spotify_client()
-        if sp:
-            with st.spinner(f"🎵 Finding {mood} songs..."):
-                try:
-                    # Primary recommendation method
-                    rec = sp.recommendations(
-                        seed_genres=mood_config["seed_genres"][:2],
-                        limit=15,
-                        target_valence=sum(mood_config["valence_range"]) / 2,
-                        target_energy=sum(mood_config["energy_range"]) / 2,
-                        min_valence=mood_config["valence_range"][0],
-                        max_valence=mood_config["valence_range"][1],
-                        min_energy=mood_config["energy_range"][0],
-                        max_energy=mood_config["energy_range"][1]
-                    )
-                    
-                    # Display results
-                    st.subheader(f"Your {mood} playlist {mood_config['emoji']}:")
-                    cols = st.columns(2)
-                    
-                    for i, track in enumerate(rec["tracks"][:6]):
-                        with cols[i % 2]:
-                            st.write(f"#### {i+1}. {track['name']}")
-                            st.write(f"**Artist**: {track['artists'][0]['name']}")
-                            if track['preview_url']:
-                                st.audio(track['preview_url'], format="audio/mp3")
-                            st.markdown(f"[Open in Spotify]({track['external_urls']['spotify']})")
-                            st.divider()
-                    
-                    # Save playlist
-                    try:
-                        playlist = sp.user_playlist_create(
-                            user=sp.me()["id"],
-                            name=f"{mood_config['emoji']} Moody: {mood.capitalize()} Vibes",
-                            public=False,
-                            description=f"Auto-generated based on mood: '{user_input}'"
-                        )
-                        sp.playlist_add_items(playlist["id"], [t["uri"] for t in rec["tracks"][:30]])
-                        st.success(f"✅ Playlist saved to your Spotify!")
-                        st.markdown(f"[🔗 Open Playlist]({playlist['external_urls']['spotify']})", unsafe_allow_html=True)
-                    except Exception as e:
-                        st.error(f"❌ Couldn't save playlist: {str(e)}")
-                
-                except Exception as e:
-                    st.warning("⚠️ Using fallback search method...")
-                    try:
-                        results = sp.search(q=f"{mood} music", type="track", limit=15)
-                        st.subheader(f"Your {mood} playlist (fallback):")
-                        for i, track in enumerate(results["tracks"]["items"][:6]):
-                            st.write(f"{i+1}. [{track['name']}]({track['external_urls']['spotify']}) by {track['artists'][0]['name']}")
-                    except Exception as e:
-                        st.error(f"❌ Fallback failed: {str(e)}")
-
-# History sidebar
-with st.sidebar:
-    st.subheader("Your Mood History")
-    for mood, text in reversed(st.session_state.history[-5:]):
-=======
-import streamlit as st
-from spotipy.oauth2 import SpotifyOAuth
-import spotipy
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from dotenv import load_dotenv
-import os
-
-# Load environment variables
-load_dotenv()
-
-# --- MOOD CONFIGURATION ---
-MOOD_KEYWORDS = {
-    "sad": ["rough", "awful", "terrible", "depressed", "sad", "cry", "grumpy"],
-    "mellow": ["meh", "okay", "fine", "chill", "relax", "peaceful", "tired"],
-    "happy": ["joy", "happy", "awesome", "great", "good"],
-    "hyped": ["excited", "pumped", "amazing", "best day", "wow"]
-}
-
-MOOD_SETTINGS = {
-    "sad": {
-        "keywords": ["melancholic", "sad", "heartbreak"],
-        "valence_range": (0.0, 0.4),
-        "energy_range": (0.1, 0.5),
-        "seed_genres": ["blues", "acoustic"],
-        "color": "#3498db",
-        "emoji": "😢"
-    },
-    "mellow": {
-        "keywords": ["chill", "lo-fi", "calm"],
-        "valence_range": (0.3, 0.6),
-        "energy_range": (0.3, 0.6),
-        "seed_genres": ["chill", "ambient"],
-        "color": "#2ecc71",
-        "emoji": "😌"
-    },
-    "happy": {
-        "keywords": ["happy", "uplifting", "joyful"],
-        "valence_range": (0.6, 0.8),
-        "energy_range": (0.5, 0.8),
-        "seed_genres": ["pop", "indie"],
-        "color": "#f1c40f",
-        "emoji": "😊"
-    },
-    "hyped": {
-        "keywords": ["energy", "workout", "party"],
-        "valence_range": (0.8, 1.0),
-        "energy_range": (0.7, 1.0),
-        "seed_genres": ["edm", "dance"],
-        "color": "#e74c3c",
-        "emoji": "🤩"
-    }
-}
-
-# --- CORE FUNCTIONS ---
-def analyze_mood(text):
-    analyzer = SentimentIntensityAnalyzer()
-    sentiment = analyzer.polarity_scores(text)["compound"]
-    text_lower = text.lower()
-    
-    # Keyword matching first
-    for mood, keywords in MOOD_KEYWORDS.items():
-        if any(keyword in text_lower for keyword in keywords):
-            return mood, MOOD_SETTINGS[mood]
-    
-    # Sentiment fallback
-    if sentiment < -0.5:
-        return "sad", MOOD_SETTINGS["sad"]
-    elif sentiment < -0.1:
-        return "mellow", MOOD_SETTINGS["mellow"]
-    elif sentiment < 0.6:
-        return "happy", MOOD_SETTINGS["happy"]
-    return "hyped", MOOD_SETTINGS["hyped"]
-
-def get_spotify_client():
+        st.caption(f"⚠️ Preview unavailable: {e}")
+
+def render_track(position, track):
+    """Render one track card in the results grid"""
+    st.write(f"#### {position}. {track['name']}")
+    st.write(f"**Artist**: {track['artists'][0]['name']}")
+    if track['preview_url']:
+        preview_player(track)
+    st.markdown(f"[Open in Spotify]({track['external_urls']['spotify']})")
+    st.divider()
+
+def show_api_calls(client, calls_before):
+    calls = client.calls - calls_before
+    st.caption(f"Spotify API calls this click: {sum(calls.values())} ({', '.join(f'{name} ×{n}' for name, n in calls.items())})")
+
+def poll_pending_save():
+    """Fragment polling the background save; reruns the whole app once it finishes"""
+    if st.session_state.pending_save["future"].done():
+        st.rerun()
+    st.info("💾 Saving playlist to your Spotify...")
+
+def show_saved_tracks(pending):
+    """Re-render the tracks of a finished save; the click that found them was a previous run"""
+    mood, mood_config = pending["mood"], MOOD_SETTINGS[pending["mood"]]
+    apply_mood_theme(mood)
+    st.subheader(f"Your {mood} playlist {mood_config['emoji']}:")
+    cols = st.columns(2)
+    for position, track in enumerate(pending["tracks"], start=1):
+        with cols[(position - 1) % 2]:
+            render_track(position, track)
+
+def show_save_result(pending):
+    """Report a finished background save"""
     try:
-        return spotipy.Spotify(auth_manager=SpotifyOAuth(
-            scope="playlist-modify-private",
-            redirect_uri="http://localhost:8888/callback"
-        ))
+        playlist = pending["future"].result()
+        st.success(f"✅ Playlist saved to your Spotify!")
+        st.markdown(f"[🔗 Open Playlist]({playlist['external_urls']['spotify']})", unsafe_allow_html=True)
     except Exception as e:
-        st.error(f"❌ Spotify login failed: {e}")
-        return None
-
-def apply_mood_theme(mood):
-    """Apply dynamic styling based on mood"""
-    st.markdown(f"""
-        <style>
-            .stTextInput input {{ border-color: {MOOD_SETTINGS[mood]['color']} }}
-            .stButton>button {{ 
-                background-color: {MOOD_SETTINGS[mood]['color']};
-                color: white;
-            }}
-            .mood-header {{ color: {MOOD_SETTINGS[mood]['color']} }}
-        </style>
-    """, unsafe_allow_html=True)
+        st.error(f"❌ Couldn't save playlist: {str(e)}")
+    show_api_calls(pending["client"], pending["calls_before"])
 
 # --- STREAMLIT UI ---
 st.set_page_config(page_title="Moody Playlist Generator", page_icon="🎧")
 
-# Sidebar for history
-if 'history' not in st.session_state:
-    st.session_state.history = []
-
 # Main app
 st.title(f"{MOOD_SETTINGS['happy']['emoji']} Moody Playlist Generator")
 user_input = st.text_input("How are you feeling today?", "I'm feeling...")
 
-if st.button("Create Playlist"):
+clicked = st.button("Create Playlist")
+if clicked:
     if not user_input or "I'm feeling..." in user_input:
         st.warning("Please share your mood!")
     else:
-        mood, mood_config = analyze_mood(user_input)
-        st.session_state.history.append((mood, user_input))
-        
-        # Apply mood-specific styling
-        apply_mood_theme(mood)
-        st.success(f"Detected mood: **{mood_config['emoji']} {mood.upper()}**")
-        
-        sp = get_spotify_client()
-        if sp:
-            with st.spinner(f"🎵 Finding {mood} songs..."):
-                try:
-                    # Primary recommendation method
-                    rec = sp.recommendations(
-                        seed_genres=mood_config["seed_genres"][:2],
-                        limit=15,
-                        target_valence=sum(mood_config["valence_range"]) / 2,
-                        target_energy=sum(mood_config["energy_range"]) / 2,
-                        min_valence=mood_config["valence_range"][0],
-                        max_valence=mood_config["valence_range"][1],
-                        min_energy=mood_config["energy_range"][0],
-                        max_energy=mood_config["energy_range"][1]
-                    )
-                    
-                    # Display results
-                    st.subheader(f"Your {mood} playlist {mood_config['emoji']}:")
-                    cols = st.columns(2)
-                    
-                    for i, track in enumerate(rec["tracks"][:6]):
-                        with cols[i % 2]:
-                            st.write(f"#### {i+1}. {track['name']}")
-                            st.write(f"**Artist**: {track['artists'][0]['name']}")
-                            if track['preview_url']:
-                                st.audio(track['preview_url'], format="audio/mp3")
-                            st.markdown(f"[Open in Spotify]({track['external_urls']['spotify']})")
-                            st.divider()
-                    
-                    # Save playlist
-                    try:
-                        playlist = sp.user_playlist_create(
-                            user=sp.me()["id"],
-                            name=f"{mood_config['emoji']} Moody: {mood.capitalize()} Vibes",
-                            public=False,
-                            description=f"Auto-generated based on mood: '{user_input}'"
-                        )
-                        sp.playlist_add_items(playlist["id"], [t["uri"] for t in rec["tracks"][:30]])
-                        st.success(f"✅ Playlist saved to your Spotify!")
-                        st.markdown(f"[🔗 Open Playlist]({playlist['external_urls']['spotify']})", unsafe_allow_html=True)
-                    except Exception as e:
-                        st.error(f"❌ Couldn't save playlist: {str(e)}")
-                
-                except Exception as e:
-                    st.warning("⚠️ Using fallback search method...")
-                    try:
-                        results = sp.search(q=f"{mood} music", type="track", limit=15)
-                        st.subheader(f"Your {mood} playlist (fallback):")
-                        for i, track in enumerate(results["tracks"]["items"][:6]):
-                            st.write(f"{i+1}. [{track['name']}]({track['external_urls']['spotify']}) by {track['artists'][0]['name']}")
-                    except Exception as e:
-                        st.error(f"❌ Fallback failed: {str(e)}")
-
-# History sidebar
-with st.sidebar:
-    st.subheader("Your Mood History")
-    for mood, text in reversed(st.session_state.history[-5:]):
-        st.write(f"{MOOD_SETTINGS[mood]['emoji']} {text} → *{mood}*")# --- MOOD CONFIGURATION ---
-MOOD_KEYWORDS = {
-    "sad": ["rough", "awful", "terrible", "depressed", "sad", "cry", "grumpy"],
-    "mellow": ["meh", "okay", "fine", "chill", "relax", "peaceful", "tired"],
-    "happy": ["joy", "happy", "awesome", "great", "good"],
-    "hyped": ["excited", "pumped", "amazing", "best day", "wow"]
-}
-
-MOOD_SETTINGS = {
-    "sad": {
-        "keywords": ["melancholic", "sad", "heartbreak"],
-        "valence_range": (0.0, 0.4),
-        "energy_range": (0.1, 0.5),
-        "seed_genres": ["blues", "acoustic"],
-        "color": "#3498db",
-        "emoji": "😢"
-    },
-    "mellow": {
-        "keywords": ["chill", "lo-fi", "calm"],
-        "valence_range": (0.3, 0.6),
-        "energy_range": (0.3, 0.6),
-        "seed_genres": ["chill", "ambient"],
-        "color": "#2ecc71",
-        "emoji": "😌"
-    },
-    "happy": {
-        "keywords": ["happy", "uplifting", "joyful"],
-        "valence_range": (0.6, 0.8),
-        "energy_range": (0.5, 0.8),
-        "seed_genres": ["pop", "indie"],
-        "color": "#f1c40f",
-        "emoji": "😊"
-    },
-    "hyped": {
-        "keywords": ["energy", "workout", "party"],
-        "valence_range": (0.8, 1.0),
-        "energy_range": (0.7, 1.0),
-        "seed_genres": ["edm", "dance"],
-        "color": "#e74c3c",
-        "emoji": "🤩"
-    }
-}
-
-# --- CORE FUNCTIONS ---
-def analyze_mood(text):
-    analyzer = SentimentIntensityAnalyzer()
-    sentiment = analyzer.polarity_scores(text)["compound"]
-    text_lower = text.lower()
-    
-    # Keyword matching first
-    for mood, keywords in MOOD_KEYWORDS.items():
-        if any(keyword in text_lower for keyword in keywords):
-            return mood, MOOD_SETTINGS[mood]
-    
-    # Sentiment fallback
-    if sentiment < -0.5:
-        return "sad", MOOD_SETTINGS["sad"]
-    elif sentiment < -0.1:
-        return "mellow", MOOD_SETTINGS["mellow"]
-    elif sentiment < 0.6:
-        return "happy", MOOD_SETTINGS["happy"]
-    return "hyped", MOOD_SETTINGS["hyped"]
-
-def get_spotify_client():
-    try:
-        return spotipy.Spotify(auth_manager=SpotifyOAuth(
-            scope="playlist-modify-private",
-            redirect_uri="http://localhost:8888/callback"
-        ))
-    except Exception as e:
-        st.error(f"❌ Spotify login failed: {e}")
-        return None
-
-def apply_mood_theme(mood):
-    """Apply dynamic styling based on mood"""
-    st.markdown(f"""
-        <style>
-            .stTextInput input {{ border-color: {MOOD_SETTINGS[mood]['color']} }}
-            .stButton>button {{ 
-                background-color: {MOOD_SETTINGS[mood]['color']};
-                color: white;
-            }}
-            .mood-header {{ color: {MOOD_SETTINGS[mood]['color']} }}
-        </style>
-    """, unsafe_allow_html=True)
-
-# --- STREAMLIT UI ---
-st.set_page_config(page_title="Moody Playlist Generator", page_icon="🎧")
+        with span("analyze_mood"):
+            mood, mood_config = analyze_mood(user_input)
 
-# Sidebar for history
-if 'history' not in st.session_state:
-    st.session_state.history = []
-
-# Main app
-st.title(f"{MOOD_SETTINGS['happy']['emoji']} Moody Playlist Generator")
-user_input = st.text_input("How are you feeling today?", "I'm feeling...")
-
-if st.button("Create Playlist"):
-    if not user_input or "I'm feeling..." in user_input:
-        st.warning("Please share your mood!")
-    else:
-        mood, mood_config = analyze_mood(user_input)
-        st.session_state.history.append((mood, user_input))
-        
         # Apply mood-specific styling
         apply_mood_theme(mood)
         st.success(f"Detected mood: **{mood_config['emoji']} {mood.upper()}**")
-        
-        sp = get_spotify_client()
-        if sp:
-            with st.spinner(f"🎵 Finding {mood} songs..."):
-                try:
-                    # Primary recommendation method
-                    rec = sp.recommendations(
-                        seed_genres=mood_config["seed_genres"][:2],
-                        limit=15,
-                        target_valence=sum(mood_config["valence_range"]) / 2,
-                        target_energy=sum(mood_config["energy_range"]) / 2,
-                        min_valence=mood_config["valence_range"][0],
-                        max_valence=mood_config["valence_range"][1],
-                        min_energy=mood_config["energy_range"][0],
-                        max_energy=mood_config["energy_range"][1]
-                    )
-                    
-                    # Display results
-                    st.subheader(f"Your {mood} playlist {mood_config['emoji']}:")
-                    cols = st.columns(2)
-                    
-                    for i, track in enumerate(rec["tracks"][:6]):
-                        with cols[i % 2]:
-                            st.write(f"#### {i+1}. {track['name']}")
-                            st.write(f"**Artist**: {track['artists'][0]['name']}")
-                            if track['preview_url']:
-                                st.audio(track['preview_url'], format="audio/mp3")
-                            st.markdown(f"[Open in Spotify]({track['external_urls']['spotify']})")
-                            st.divider()
-                    
-                    # Save playlist
-                    try:
-                        playlist = sp.user_playlist_create(
-                            user=sp.me()["id"],
-                            name=f"{mood_config['emoji']} Moody: {mood.capitalize()} Vibes",
-                            public=False,
-                            description=f"Auto-generated based on mood: '{user_input}'"
-                        )
-                        sp.playlist_add_items(playlist["id"], [t["uri"] for t in rec["tracks"][:30]])
-                        st.success(f"✅ Playlist saved to your Spotify!")
-                        st.markdown(f"[🔗 Open Playlist]({playlist['external_urls']['spotify']})", unsafe_allow_html=True)
-                    except Exception as e:
-                        st.error(f"❌ Couldn't save playlist: {str(e)}")
-                
-                except Exception as e:
-                    st.warning("⚠️ Using fallback search method...")
-                    try:
-                        results = sp.search(q=f"{mood} music", type="track", limit=15)
-                        st.subheader(f"Your {mood} playlist (fallback):")
-                        for i, track in enumerate(results["tracks"]["items"][:6]):
-                            st.write(f"{i+1}. [{track['name']}]({track['external_urls']['spotify']}) by {track['artists'][0]['name']}")
-                    except Exception as e:
-                        st.error(f"❌ Fallback failed: {str(e)}")
-
-# History sidebar
-with st.sidebar:
-    st.subheader("Your Mood History")
-    for mood, text in reversed(st.session_state.history[-5:]):
-        st.write(f"{MOOD_SETTINGS[mood]['emoji']} {text} → *{mood}*")# --- MOOD CONFIGURATION ---
-MOOD_KEYWORDS = {
-    "sad": ["rough", "awful", "terrible", "depressed", "sad", "cry", "grumpy"],
-    "mellow": ["meh", "okay", "fine", "chill", "relax", "peaceful", "tired"],
-    "happy": ["joy", "happy", "awesome", "great", "good"],
-    "hyped": ["excited", "pumped", "amazing", "best day", "wow"]
-}
-
-MOOD_SETTINGS = {
-    "sad": {
-        "keywords": ["melancholic", "sad", "heartbreak"],
-        "valence_range": (0.0, 0.4),
-        "energy_range": (0.1, 0.5),
-        "seed_genres": ["blues", "acoustic"],
-        "color": "#3498db",
-        "emoji": "😢"
-    },
-    "mellow": {
-        "keywords": ["chill", "lo-fi", "calm"],
-        "valence_range": (0.3, 0.6),
-        "energy_range": (0.3, 0.6),
-        "seed_genres": ["chill", "ambient"],
-        "color": "#2ecc71",
-        "emoji": "😌"
-    },
-    "happy": {
-        "keywords": ["happy", "uplifting", "joyful"],
-        "valence_range": (0.6, 0.8),
-        "energy_range": (0.5, 0.8),
-        "seed_genres": ["pop", "indie"],
-        "color": "#f1c40f",
-        "emoji": "😊"
-    },
-    "hyped": {
-        "keywords": ["energy", "workout", "party"],
-        "valence_range": (0.8, 1.0),
-        "energy_range": (0.7, 1.0),
-        "seed_genres": ["edm", "dance"],
-        "color": "#e74c3c",
-        "emoji": "🤩"
-    }
-}
-
-# --- CORE FUNCTIONS ---
-def analyze_mood(text):
-    analyzer = SentimentIntensityAnalyzer()
-    sentiment = analyzer.polarity_scores(text)["compound"]
-    text_lower = text.lower()
-    
-    # Keyword matching first
-    for mood, keywords in MOOD_KEYWORDS.items():
-        if any(keyword in text_lower for keyword in keywords):
-            return mood, MOOD_SETTINGS[mood]
-    
-    # Sentiment fallback
-    if sentiment < -0.5:
-        return "sad", MOOD_SETTINGS["sad"]
-    elif sentiment < -0.1:
-        return "mellow", MOOD_SETTINGS["mellow"]
-    elif sentiment < 0.6:
-        return "happy", MOOD_SETTINGS["happy"]
-    return "hyped", MOOD_SETTINGS["hyped"]
-
-def get_spotify_client():
-    try:
-        return spotipy.Spotify(auth_manager=SpotifyOAuth(
-            scope="playlist-modify-private",
-            redirect_uri="http://localhost:8888/callback"
-        ))
-    except Exception as e:
-        st.error(f"❌ Spotify login failed: {e}")
-        return None
-
-def apply_mood_theme(mood):
-    """Apply dynamic styling based on mood"""
-    st.markdown(f"""
-        <style>
-            .stTextInput input {{ border-color: {MOOD_SETTINGS[mood]['color']} }}
-            .stButton>button {{ 
-                background-color: {MOOD_SETTINGS[mood]['color']};
-                color: white;
-            }}
-            .mood-header {{ color: {MOOD_SETTINGS[mood]['color']} }}
-        </style>
-    """, unsafe_allow_html=True)
 
-# --- STREAMLIT UI ---
-st.set_page_config(page_title="Moody Playlist Generator", page_icon="🎧")
-
-# Sidebar for history
-if 'history' not in st.session_state:
-    st.session_state.history = []
-
-# Main app
-st.title(f"{MOOD_SETTINGS['happy']['emoji']} Moody Playlist Generator")
-user_input = st.text_input("How are you feeling today?", "I'm feeling...")
-
-if st.button("Create Playlist"):
-    if not user_input or "I'm feeling..." in user_input:
-        st.warning("Please share your mood!")
-    else:
-        mood, mood_config = analyze_mood(user_input)
-        st.session_state.history.append((mood, user_input))
-        
-        # Apply mood-specific styling
-        apply_mood_theme(mood)
-        st.success(f"Detected mood: **{mood_config['emoji']} {mood.upper()}**")
-        
-        sp = get_spotify_client()
-        if sp:
-            with st.spinner(f"🎵 Finding {mood} songs..."):
+        # Count from before login, so a login click includes its me / seed validation / token calls
+        logged_in = st.session_state.get("spotify")
+        calls_before = logged_in["client"].calls.copy() if logged_in else Counter()
+        with span("client_init"):
+            spotify = get_spotify_client()
+        record_history(history_user(), mood, user_input)
+        if spotify:
+            client = spotify["client"]
+            tracks, fallback = [], False
+            st.subheader(f"Your {mood} playlist {mood_config['emoji']}:")
+            cols = st.columns(2)
+            with st.spinner(f"🎵 Finding {mood} songs..."), span("get_tracks"):
                 try:
-                    # Primary recommendation method
-                    rec = sp.recommendations(
-                        seed_genres=mood_config["seed_genres"][:2],
-                        limit=15,
-                        target_valence=sum(mood_config["valence_range"]) / 2,
-                        target_energy=sum(mood_config["energy_range"]) / 2,
-                        min_valence=mood_config["valence_range"][0],
-                        max_valence=mood_config["valence_range"][1],
-                        min_energy=mood_config["energy_range"][0],
-                        max_energy=mood_config["energy_range"][1]
-                    )
-                    
-                    # Display results
-                    st.subheader(f"Your {mood} playlist {mood_config['emoji']}:")
-                    cols = st.columns(2)
-                    
-                    for i, track in enumerate(rec["tracks"][:6]):
-                        with cols[i % 2]:
-                            st.write(f"#### {i+1}. {track['name']}")
-                            st.write(f"**Artist**: {track['artists'][0]['name']}")
-                            if track['preview_url']:
-                                st.audio(track['preview_url'], format="audio/mp3")
-                            st.markdown(f"[Open in Spotify]({track['external_urls']['spotify']})")
-                            st.divider()
-                    
-                    # Save playlist
-                    try:
-                        playlist = sp.user_playlist_create(
-                            user=sp.me()["id"],
-                            name=f"{mood_config['emoji']} Moody: {mood.capitalize()} Vibes",
-                            public=False,
-                            description=f"Auto-generated based on mood: '{user_input}'"
-                        )
-                        sp.playlist_add_items(playlist["id"], [t["uri"] for t in rec["tracks"][:30]])
-                        st.success(f"✅ Playlist saved to your Spotify!")
-                        st.markdown(f"[🔗 Open Playlist]({playlist['external_urls']['spotify']})", unsafe_allow_html=True)
-                    except Exception as e:
-                        st.error(f"❌ Couldn't save playlist: {str(e)}")
-                
+                    # Render each track as soon as its source delivers it
+                    for source, track in iter_async(stream_tracks(client, mood, mood_config, get_track_index(), get_track_pools())):
+                        if source == "search" and not fallback:
+                            fallback = True
+                            st.warning("⚠️ Using fallback search method...")
+                        if len(tracks) < 6:
+                            with cols[len(tracks) % 2]:
+                                render_track(len(tracks) + 1, track)
+                        tracks.append(track)
                 except Exception as e:
-                    st.warning("⚠️ Using fallback search method...")
-                    try:
-                        results = sp.search(q=f"{mood} music", type="track", limit=15)
-                        st.subheader(f"Your {mood} playlist (fallback):")
-                        for i, track in enumerate(results["tracks"]["items"][:6]):
-                            st.write(f"{i+1}. [{track['name']}]({track['external_urls']['spotify']}) by {track['artists'][0]['name']}")
-                    except Exception as e:
-                        st.error(f"❌ Fallback failed: {str(e)}")
+                    st.error(f"❌ Fallback failed: {str(e)}")
+
+            # Save in the background; show_pending_save reports when it finishes
+            if tracks and not fallback:
+                st.session_state.pending_save = {
+                    "future": submit_async(save_playlist(
+                        client, spotify["user"]["id"], mood, mood_config, user_input, [t["uri"] for t in tracks]
+                    )),
+                    "client": client,
+                    "calls_before": calls_before,
+                    "mood": mood,
+                    "tracks": tracks[:6],
+                }
+            else:
+                st.session_state.pop("pending_save", None)
+                show_api_calls(client, calls_before)
+
+# Poll only while a save is running; report a finished one once, then forget it
+pending = st.session_state.get("pending_save")
+if pending and pending["future"].done():
+    del st.session_state.pending_save
+    if not clicked:
+        show_saved_tracks(pending)
+    show_save_result(pending)
+elif pending:
+    st.fragment(poll_pending_save, run_every=1)()
 
 # History sidebar
 with st.sidebar:
     st.subheader("Your Mood History")
-    for mood, text in reversed(st.session_state.history[-5:]):
->>>>>>> 70a5def453255553a422fb0897c38473da186951
-        st.write(f"{MOOD_SETTINGS[mood]['emoji']} {text} → *{mood}*")
\ No newline at end of file
+    user = history_user()
+    for ts, mood, text in reversed(history_view(user)):
+        st.write(f"{MOOD_SETTINGS.get(mood, {}).get('emoji', '🎵')} {text} → *{mood}*")
+    this_week = get_history_store().rolling_counts(user, days=7) if user else {}
+    if this_week:
+        st.caption("This week: " + " · ".join(
+            f"{MOOD_SETTINGS.get(mood, {}).get('emoji', mood)} {count}" for mood, count in this_week.items()))
+    if user:
+        with st.expander("📈 Mood trends"):
+            show_mood_trends(user)
+
+    timings = get_timings()
+    if timings:
+        with st.expander("⏱️ Stage timings"):
+            st.dataframe({stage: {k: round(v * 1000, 1) if k != "count" else v for k, v in stats.items()}
+                          for stage, stats in timings.snapshot().items()})
+            st.caption("Times in ms; percentiles over the recent window.")
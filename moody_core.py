@@ -0,0 +1,147 @@
+import asyncio
+from keywords import KeywordMatcher
+from mood_routes import default_router
+from playlist_writer import add_items_bulk
+from sentiment import classify_texts, memo_score
+from spotify_cache import cached_recommendations_async
+from timings import span
+
+# --- MOOD CONFIGURATION ---
+MOOD_KEYWORDS = {
+    "sad": ["rough", "awful", "terrible", "depressed", "sad", "cry", "grumpy"],
+    "mellow": ["meh", "okay", "fine", "chill", "relax", "peaceful", "tired"],
+    "happy": ["joy", "happy", "awesome", "great", "good"],
+    "hyped": ["excited", "pumped", "amazing", "best day", "wow"]
+}
+
+MOOD_SETTINGS = {
+    "sad": {
+        "keywords": ["melancholic", "sad", "heartbreak"],
+        "valence_range": (0.0, 0.4),
+        "energy_range": (0.1, 0.5),
+        "seed_genres": ["blues", "acoustic"],
+        "color": "#3498db",
+        "emoji": "😢"
+    },
+    "mellow": {
+        "keywords": ["chill", "lo-fi", "calm"],
+        "valence_range": (0.3, 0.6),
+        "energy_range": (0.3, 0.6),
+        "seed_genres": ["chill", "ambient"],
+        "color": "#2ecc71",
+        "emoji": "😌"
+    },
+    "happy": {
+        "keywords": ["happy", "uplifting", "joyful"],
+        "valence_range": (0.6, 0.8),
+        "energy_range": (0.5, 0.8),
+        "seed_genres": ["pop", "indie"],
+        "color": "#f1c40f",
+        "emoji": "😊"
+    },
+    "hyped": {
+        "keywords": ["energy", "workout", "party"],
+        "valence_range": (0.8, 1.0),
+        "energy_range": (0.7, 1.0),
+        "seed_genres": ["edm", "dance"],
+        "color": "#e74c3c",
+        "emoji": "🤩"
+    }
+}
+MOODS = list(MOOD_SETTINGS)
+KEYWORD_MATCHER = KeywordMatcher(MOOD_KEYWORDS)
+
+# Resolved on first use, so a MOODY_MOOD_ROUTES loaded by load_dotenv() after import still applies
+_mood_router = None
+
+def mood_router():
+    """Return the shared sentiment routing table, checked against MOOD_SETTINGS."""
+    global _mood_router
+    if _mood_router is None:
+        router = default_router()
+        router.check(MOOD_SETTINGS)
+        _mood_router = router
+    return _mood_router
+
+# --- CORE FUNCTIONS ---
+def keyword_mood(text_lower):
+    return KEYWORD_MATCHER.match(text_lower)
+
+def analyze_mood(text):
+    # Repeated prompts reuse their memoized score
+    text_key, sentiment = memo_score(text)
+
+    # Keyword matching first, then the sentiment routing table
+    mood = keyword_mood(text_key.lower()) or mood_router().route(sentiment)
+    return mood, MOOD_SETTINGS[mood]
+
+def analyze_moods(texts):
+    """Batch analyze_mood: returns (mood ids indexing MOODS, compound scores) arrays."""
+    return classify_texts(texts, keyword_mood, MOODS, mood_router())
+
+def recommendation_params(mood_config):
+    """Recommendation request parameters for a mood: genre seeds inside its valence/energy box."""
+    return {
+        "seed_genres": mood_config["seed_genres"][:2],
+        "limit": 15,
+        "target_valence": sum(mood_config["valence_range"]) / 2,
+        "target_energy": sum(mood_config["energy_range"]) / 2,
+        "min_valence": mood_config["valence_range"][0],
+        "max_valence": mood_config["valence_range"][1],
+        "min_energy": mood_config["energy_range"][0],
+        "max_energy": mood_config["energy_range"][1]
+    }
+
+async def fetch_pool_tracks(client, mood, mood_config, size=100):
+    """Candidates for a mood's track pool: uncached recommendations, or two pages of search."""
+    params = dict(recommendation_params(mood_config), limit=min(size, 100))
+    try:
+        if not params["seed_genres"]:
+            raise ValueError("no valid seed genres")
+        return (await client.recommendations(**params))["tracks"]
+    except Exception:
+        pages = await asyncio.gather(*(client.search(q=f"{mood} music", type="track", limit=min(50, size), offset=offset)
+                                       for offset in range(0, min(size, 100), 50)))
+        return [track for page in pages for track in page["tracks"]["items"]]
+
+async def stream_tracks(client, mood, mood_config, index=None, pools=None, cache=None):
+    """Yield (source, track) pairs as soon as a track source answers.
+
+    source is "catalog" for a local TrackIndex, "pool" for a sample of the mood's
+    warm TrackPools pool, "recommendations" for the Spotify recommendations
+    endpoint (cached in cache, by default the process-wide cache), or "search"
+    for the fallback search.
+    """
+    params = recommendation_params(mood_config)
+    if index is not None:
+        for track in index.recommendations(**params)["tracks"]:
+            yield "catalog", track
+        return
+    sample = pools.sample(mood, params["limit"]) if pools is not None else None
+    if sample:
+        for track in sample:
+            yield "pool", track
+        return
+    try:
+        if not params["seed_genres"]:
+            raise ValueError("no valid seed genres")
+        rec = await cached_recommendations_async(client, cache, **params)
+    except Exception:
+        results = await client.search(q=f"{mood} music", type="track", limit=15)
+        for track in results["tracks"]["items"]:
+            yield "search", track
+        return
+    for track in rec["tracks"]:
+        yield "recommendations", track
+
+async def save_playlist(client, user_id, mood, mood_config, text, uris):
+    """Create the mood playlist and add uris to it; returns the playlist object."""
+    with span("create_playlist"):
+        playlist = await client.user_playlist_create(
+            user=user_id,
+            name=f"{mood_config['emoji']} Moody: {mood.capitalize()} Vibes",
+            public=False,
+            description=f"Auto-generated based on mood: '{text}'"
+        )
+        await add_items_bulk(client, playlist["id"], uris)
+    return playlist
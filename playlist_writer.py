@@ -0,0 +1,53 @@
+import asyncio
+import time
+from timings import span
+
+# The Web API accepts at most 100 URIs per playlist_add_items call
+BATCH_SIZE = 100
+
+def _batches(uris, size):
+    return [uris[i:i + size] for i in range(0, len(uris), size)]
+
+def _report(uris, batches, started):
+    seconds = time.perf_counter() - started
+    return {
+        "items": len(uris),
+        "batches": len(batches),
+        "seconds": seconds,
+        "items_per_second": len(uris) / seconds if seconds else 0.0,
+    }
+
+async def add_items_bulk(client, playlist_id, uris, concurrency=1, batch_size=BATCH_SIZE):
+    """Add any number of URIs to a playlist through an AsyncSpotify client.
+
+    Batches go out in order, one at a time, so the playlist keeps the track order;
+    concurrency > 1 overlaps batches when order across batches doesn't matter.
+    429/Retry-After handling comes from the client's RequestScheduler.
+    Returns a report with item and batch counts and items/second.
+    """
+    uris = list(uris)
+    batches = _batches(uris, batch_size)
+    started = time.perf_counter()
+    with span("add_items"):
+        if concurrency == 1:
+            for batch in batches:
+                await client.playlist_add_items(playlist_id, batch)
+        else:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def send(batch):
+                async with semaphore:
+                    await client.playlist_add_items(playlist_id, batch)
+
+            await asyncio.gather(*(send(batch) for batch in batches))
+    return _report(uris, batches, started)
+
+def add_items_bulk_sync(sp, playlist_id, uris, batch_size=BATCH_SIZE):
+    """add_items_bulk for a (ScheduledSpotify-wrapped) spotipy client; batches are sent in order."""
+    uris = list(uris)
+    batches = _batches(uris, batch_size)
+    started = time.perf_counter()
+    with span("add_items"):
+        for batch in batches:
+            sp.playlist_add_items(playlist_id, batch)
+    return _report(uris, batches, started)
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from async_spotify import _shared_session, run_async
+
+# Defaults can be overridden from .env
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "moody", "previews")
+DEFAULT_MAX_MB = 200
+
+class PreviewCache:
+    """LRU disk cache of 30-second preview MP3s keyed by track id.
+
+    Files live in one directory; their modification time records the last access,
+    so the LRU order survives restarts. The total size is kept under max_bytes.
+    """
+
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        # Least recently used first
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(files))
+        self.total_bytes = sum(self._entries.values())
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    @staticmethod
+    def _key(track_id):
+        return track_id if track_id.isalnum() else hashlib.sha1(track_id.encode("utf-8")).hexdigest()
+
+    def get(self, track_id):
+        """Return the cached preview bytes for track_id, or None if it isn't cached."""
+        key = self._key(track_id)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                self.total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def set(self, track_id, data):
+        """Store preview bytes, evicting the least recently used files past max_bytes."""
+        key = self._key(track_id)
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+            self.total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            while self.total_bytes > self.max_bytes:
+                stale, size = self._entries.popitem(last=False)
+                try:
+                    os.remove(self._path(stale))
+                except OSError:
+                    pass
+                self.total_bytes -= size
+                self.evictions += 1
+
+    def fetch(self, track_id, url):
+        """Return the preview for a track, downloading and caching it on a miss."""
+        data = self.get(track_id)
+        if data is None:
+            data = run_async(download_preview(url))
+            self.set(track_id, data)
+        return data
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "bytes": self.total_bytes,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+async def download_preview(url):
+    """Download a preview over the pooled keep-alive session."""
+    async with _shared_session().get(url) as response:
+        response.raise_for_status()
+        return await response.read()
+
+def preview_cache_from_env():
+    """Create the cache configured by MOODY_PREVIEW_CACHE_DIR / MOODY_PREVIEW_CACHE_MB."""
+    directory = os.getenv("MOODY_PREVIEW_CACHE_DIR", DEFAULT_DIR)
+    max_mb = float(os.getenv("MOODY_PREVIEW_CACHE_MB", DEFAULT_MAX_MB))
+    return PreviewCache(directory, max_bytes=int(max_mb * 1024 * 1024))
@@ -0,0 +1,268 @@
+import asyncio
+import functools
+import random
+import threading
+import time
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self, tokens):
+        """Take tokens if available and return 0, else return the seconds to wait."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available right now; return whether it succeeded."""
+        return self._take(tokens) == 0
+
+    def acquire(self, tokens=1):
+        """Block until tokens are available, then take them."""
+        while (wait := self._take(tokens)) > 0:
+            self._sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        """Wait on the event loop until tokens are available, then take them."""
+        while (wait := self._take(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+# Per-endpoint request budgets: (requests per second, burst)
+ENDPOINT_LIMITS = {
+    "recommendations": (5, 5),
+    "search": (5, 3),
+    "me": (5, 5),
+    "user_playlist_create": (2, 2),
+    "playlist_add_items": (5, 5),
+}
+DEFAULT_LIMIT = (10, 10)
+MAX_RETRIES = 4
+BASE_BACKOFF = 0.5
+MAX_BACKOFF = 30
+# A 429 halves an endpoint's rate (down to MIN_RATE_FRACTION of its budget); each success wins back 10%
+MIN_RATE_FRACTION = 0.1
+RATE_RECOVERY = 0.1
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open."""
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and closes again after `reset_timeout`.
+
+    After a reset the next failure re-opens it immediately (half-open).
+    """
+
+    def __init__(self, threshold=3, reset_timeout=60, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        """Return whether a call may go through now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                # Half-open: let calls through, re-open on the next failure
+                self._opened_at = None
+                self._failures = self.threshold - 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._opened_at = self._clock()
+
+def retry_delay(error, attempt, rng=random):
+    """Seconds to wait before retrying error, or None if it isn't retryable.
+
+    Retries 429 and 5xx responses from AsyncSpotify or spotipy: Retry-After when the
+    server sends one, otherwise exponential backoff with full jitter. A Retry-After
+    above MAX_BACKOFF (a long ban) isn't waited out; the caller falls back instead.
+    """
+    status = getattr(error, "http_status", None)
+    if status != 429 and not (status and status >= 500):
+        return None
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        headers = getattr(error, "headers", None) or {}
+        retry_after = headers.get("Retry-After") or headers.get("retry-after")
+    if retry_after is not None:
+        retry_after = float(retry_after)
+        return retry_after if retry_after <= MAX_BACKOFF else None
+    return rng.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt))
+
+def is_service_failure(error):
+    """Whether error says the endpoint itself is struggling: 429, 5xx or no response at all.
+
+    Other 4xx errors (a user's expired token, a bad request) don't trip the
+    process-wide breaker, so one user can't lock an endpoint out for everyone.
+    """
+    status = getattr(error, "http_status", None)
+    return status is None or status == 429 or status >= 500
+
+class RequestScheduler:
+    """Central gate for Spotify calls: per-endpoint token buckets, retries and circuit breakers.
+
+    Buckets adapt to throttling (AIMD on the refill rate), failed calls are retried per
+    retry_delay, and an endpoint that keeps failing is short-circuited with
+    CircuitOpenError so callers drop to their fallback path straight away.
+    """
+
+    def __init__(self, limits=None, max_retries=MAX_RETRIES, breaker_threshold=3, breaker_reset=60,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.limits = dict(ENDPOINT_LIMITS if limits is None else limits)
+        self.max_retries = max_retries
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self.counters = {}
+
+    def _endpoint(self, endpoint):
+        with self._lock:
+            if endpoint not in self._buckets:
+                rate, burst = self.limits.get(endpoint, DEFAULT_LIMIT)
+                self._buckets[endpoint] = TokenBucket(rate, burst, clock=self._clock, sleep=self._sleep)
+                self._breakers[endpoint] = CircuitBreaker(self.breaker_threshold, self.breaker_reset, clock=self._clock)
+                self.counters[endpoint] = {"calls": 0, "retries": 0, "failures": 0, "short_circuited": 0}
+            return self._buckets[endpoint], self._breakers[endpoint], self.counters[endpoint]
+
+    def _admit(self, endpoint):
+        bucket, breaker, counters = self._endpoint(endpoint)
+        if not breaker.allow():
+            counters["short_circuited"] += 1
+            raise CircuitOpenError(f"{endpoint} is failing, skipping it for now")
+        return bucket, breaker, counters
+
+    def _on_success(self, endpoint, bucket, breaker, counters):
+        counters["calls"] += 1
+        breaker.record_success()
+        base_rate = self.limits.get(endpoint, DEFAULT_LIMIT)[0]
+        bucket.rate = min(base_rate, bucket.rate + base_rate * RATE_RECOVERY)
+
+    def _on_error(self, endpoint, error, attempt, bucket, breaker, counters):
+        """Return the delay before the next attempt, or re-raise once retries are used up."""
+        counters["calls"] += 1
+        if getattr(error, "http_status", None) == 429:
+            base_rate = self.limits.get(endpoint, DEFAULT_LIMIT)[0]
+            bucket.rate = max(base_rate * MIN_RATE_FRACTION, bucket.rate / 2)
+        delay = retry_delay(error, attempt)
+        if delay is None or attempt >= self.max_retries:
+            counters["failures"] += 1
+            if is_service_failure(error):
+                breaker.record_failure()
+            raise error
+        counters["retries"] += 1
+        return delay
+
+    def call(self, endpoint, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) under endpoint's rate limit, retry policy and breaker."""
+        bucket, breaker, counters = self._admit(endpoint)
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self._sleep(self._on_error(endpoint, e, attempt, bucket, breaker, counters))
+                continue
+            self._on_success(endpoint, bucket, breaker, counters)
+            return result
+
+    async def call_async(self, endpoint, fn, *args, **kwargs):
+        """call() for coroutine functions, waiting on the event loop instead of sleeping."""
+        bucket, breaker, counters = self._admit(endpoint)
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire_async()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                await asyncio.sleep(self._on_error(endpoint, e, attempt, bucket, breaker, counters))
+                continue
+            self._on_success(endpoint, bucket, breaker, counters)
+            return result
+
+    def stats(self):
+        """Per-endpoint counters, current rate and breaker state."""
+        return {
+            endpoint: dict(counters, rate=self._buckets[endpoint].rate, circuit_open=self._breakers[endpoint].is_open)
+            for endpoint, counters in self.counters.items()
+        }
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+def default_scheduler():
+    """Return the process-wide scheduler shared by every Spotify client."""
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_scheduler_lock:
+            if _default_scheduler is None:
+                _default_scheduler = RequestScheduler()
+    return _default_scheduler
+
+class ScheduledSpotify:
+    """Wraps a spotipy client so its API methods go through a RequestScheduler.
+
+    Other attributes (auth_manager, ...) pass straight through.
+    """
+
+    def __init__(self, sp, scheduler=None):
+        self._sp = sp
+        self.scheduler = scheduler or default_scheduler()
+
+    def __getattr__(self, name):
+        attr = getattr(self._sp, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        endpoint = "me" if name == "current_user" else name
+        return functools.partial(self.scheduler.call, endpoint, attr)
+
+def scheduled_spotipy(auth_manager, scheduler=None, base_url=None):
+    """Build a spotipy client whose retries are left entirely to the RequestScheduler.
+
+    spotipy's own urllib3 retry layer turns 429 and 5xx responses into a bare
+    "Max Retries" SpotifyException(429) without headers, hiding the real status
+    and Retry-After (an empty status_forcelist falls back to its defaults). A
+    plain requests.Session has no retry policy, so responses reach retry_delay intact.
+    """
+    import requests
+    import spotipy
+    sp = spotipy.Spotify(auth_manager=auth_manager, requests_session=requests.Session(), retries=0, status_retries=0)
+    if base_url:
+        sp.prefix = base_url.rstrip("/") + "/"
+    return ScheduledSpotify(sp, scheduler)
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from async_spotify import SpotifyAPIError
+from spotify_cache import default_cache
+
+# GET /tracks accepts at most 50 ids per call
+TRACKS_BATCH_SIZE = 50
+
+# Defaults can be overridden from .env
+SEED_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "moody", "seeds.json")
+SEED_TTL = 7 * 24 * 3600
+
+class SeedCache:
+    """Seed validity results saved as one JSON file, so CLI runs don't recheck seeds.
+
+    Entries expire after ttl seconds; path=None keeps them in memory only.
+    Call save() after validating to persist new results.
+    """
+
+    def __init__(self, path=SEED_CACHE_PATH, ttl=SEED_TTL, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._entries.update(json.load(f))
+            except Exception as e:
+                print(f"⚠️ Couldn't load seed cache {path}: {e}")
+
+    def get(self, key):
+        """Return the stored value for key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            return None
+        return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = [self._clock() + self.ttl, value]
+
+    def save(self, path=None):
+        """Write the unexpired entries to path or the configured path."""
+        path = path or self.path
+        if not path:
+            return
+        now = self._clock()
+        with self._lock:
+            snapshot = {key: entry for key, entry in self._entries.items() if entry[0] > now}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"⚠️ Couldn't save seed cache {path}: {e}")
+
+def seed_cache_from_env():
+    """Open the seed cache at MOODY_SEED_CACHE, rechecked after MOODY_SEED_TTL seconds."""
+    return SeedCache(os.getenv("MOODY_SEED_CACHE", SEED_CACHE_PATH), float(os.getenv("MOODY_SEED_TTL", SEED_TTL)))
+
+async def _check_track_batch(client, ids):
+    """Return {id: is_valid} for one batch; a 400 (malformed id) falls back to one call per id."""
+    try:
+        found = (await client.tracks(ids))["tracks"]
+    except SpotifyAPIError as e:
+        if e.http_status != 400:
+            raise
+        if len(ids) == 1:
+            return {ids[0]: False}
+        # One malformed id fails the whole batch; find it by checking ids one by one
+        results = await asyncio.gather(*(_check_track_batch(client, [track_id]) for track_id in ids))
+        return {track_id: valid for result in results for track_id, valid in result.items()}
+    return {track_id: track is not None for track_id, track in zip(ids, found)}
+
+async def valid_seed_tracks(client, ids, cache=None):
+    """Return the subset of track ids Spotify still knows, checking uncached ids in batches of 50."""
+    cache = cache or default_cache()
+    validity = {}
+    unknown = []
+    for track_id in dict.fromkeys(ids):
+        cached = cache.get(f"seed_track:{track_id}")
+        if cached is None:
+            unknown.append(track_id)
+        else:
+            validity[track_id] = cached
+    batches = [unknown[i:i + TRACKS_BATCH_SIZE] for i in range(0, len(unknown), TRACKS_BATCH_SIZE)]
+    for result in await asyncio.gather(*(_check_track_batch(client, batch) for batch in batches)):
+        for track_id, valid in result.items():
+            cache.set(f"seed_track:{track_id}", valid)
+            validity[track_id] = valid
+    return {track_id for track_id, valid in validity.items() if valid}
+
+async def valid_seed_genres(client, genres, cache=None):
+    """Return the subset of genres in Spotify's available genre seeds (one cached call)."""
+    cache = cache or default_cache()
+    available = cache.get("seed_genres")
+    if available is None:
+        available = (await client.recommendation_genre_seeds())["genres"]
+        cache.set("seed_genres", available)
+    return set(genres) & set(available)
+
+async def validate_mood_seeds(client, mood_settings, cache=None):
+    """Drop dead seed_tracks / seed_genres from every mood config in place.
+
+    All moods are checked together: one batched track lookup and one genre list
+    call, both cached. Returns {mood: [removed seeds]} for the moods that lost any.
+    If the lookups themselves fail, the seeds are left untouched.
+    """
+    tracks = [t for config in mood_settings.values() for t in config.get("seed_tracks", [])]
+    genres = [g for config in mood_settings.values() for g in config.get("seed_genres", [])]
+    try:
+        valid_tracks, valid_genres = await asyncio.gather(
+            valid_seed_tracks(client, tracks, cache) if tracks else asyncio.sleep(0, set()),
+            valid_seed_genres(client, genres, cache) if genres else asyncio.sleep(0, set()),
+        )
+    except Exception as e:
+        print(f"⚠️ Couldn't validate recommendation seeds: {e}")
+        return {}
+    removed = {}
+    for mood, config in mood_settings.items():
+        for key, valid in (("seed_tracks", valid_tracks), ("seed_genres", valid_genres)):
+            if key not in config:
+                continue
+            dead = [seed for seed in config[key] if seed not in valid]
+            if dead:
+                config[key] = [seed for seed in config[key] if seed in valid]
+                removed.setdefault(mood, []).extend(dead)
+    return removed
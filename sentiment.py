@@ -0,0 +1,220 @@
+import atexit
+import json
+import os
+import re
+import string
+import threading
+from collections import OrderedDict
+import numpy as np
+from mood_routes import default_router
+from vaderSentiment.vaderSentiment import BOOSTER_DICT, NEGATE, SPECIAL_CASES, SentimentIntensityAnalyzer
+
+# One analyzer per process: building it parses the VADER lexicon and emoji files
+_analyzer = None
+_analyzer_lock = threading.RLock()
+
+# Words that make VADER look at context (negation, boosters, "but", "kind of", ...);
+# "this" two words before a lexicon word scales it by 1.25 in _negation_check
+_MODIFIER_WORDS = {w.lower() for w in NEGATE} | {w for w in BOOSTER_DICT if " " not in w} | {"but", "least", "no", "kind", "this"}
+_MODIFIER_PHRASES = re.compile("|".join(
+    re.escape(p) for p in sorted({*SPECIAL_CASES, *(w for w in BOOSTER_DICT if " " in w)}, key=len, reverse=True)
+))
+
+def get_analyzer():
+    """Return the shared SentimentIntensityAnalyzer, loading the lexicon on first use."""
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+# Memo of compound scores keyed by normalized text; MOODY_MEMO_PATH persists it across restarts
+MEMO_SIZE = 10000
+
+def normalize_text(text):
+    """Memo key for a prompt: folds only differences VADER's score ignores.
+
+    Whitespace is collapsed and trailing periods dropped where VADER would strip
+    them anyway. Case is folded unless an ALL-CAPS lexicon or booster word is
+    present, since caps emphasis only applies to those. "!" and "?" stay: VADER
+    counts them.
+    """
+    key = " ".join(text.split())
+    if len(key.rsplit(" ", 1)[-1].strip(string.punctuation)) > 2:
+        key = key.rstrip(".")
+    if key != key.lower():
+        lexicon = get_analyzer().lexicon
+        if any(token.isupper() and (token.lower() in lexicon or token.lower() in BOOSTER_DICT)
+               for token in _tokenize(key)):
+            return key
+    return key.lower()
+
+class ScoreMemo:
+    """Bounded LRU table of compound scores with hit/miss counters and JSON persistence."""
+
+    def __init__(self, maxsize=MEMO_SIZE, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._scores.update(json.load(f))
+                while len(self._scores) > maxsize:
+                    self._scores.popitem(last=False)
+            except Exception as e:
+                print(f"⚠️ Couldn't load sentiment memo {path}: {e}")
+
+    def get(self, key):
+        """Return the memoized score for key, or None."""
+        with self._lock:
+            score = self._scores.get(key)
+            if score is None:
+                self.misses += 1
+                return None
+            self._scores.move_to_end(key)
+            self.hits += 1
+            return score
+
+    def set(self, key, score):
+        with self._lock:
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.maxsize:
+                self._scores.popitem(last=False)
+                self.evictions += 1
+
+    def save(self, path=None):
+        """Write the table (least recently used first) to path or the configured path."""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            snapshot = dict(self._scores)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, path)
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._scores),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+_memo = None
+
+def default_memo():
+    """Return the process-wide score memo configured by MOODY_MEMO_SIZE / MOODY_MEMO_PATH."""
+    global _memo
+    if _memo is None:
+        with _analyzer_lock:
+            if _memo is None:
+                memo = ScoreMemo(int(os.getenv("MOODY_MEMO_SIZE", MEMO_SIZE)), os.getenv("MOODY_MEMO_PATH"))
+                if memo.path:
+                    atexit.register(memo.save)
+                _memo = memo
+    return _memo
+
+def memo_score(text, memo=None):
+    """Return (memo key, compound score of text), running VADER only on a memo miss."""
+    memo = memo or default_memo()
+    key = normalize_text(text)
+    score = memo.get(key)
+    if score is None:
+        score = get_analyzer().polarity_scores(text)["compound"]
+        memo.set(key, score)
+    return key, score
+
+class _LexiconArrays:
+    """VADER lexicon as a word -> row index map over a flat valence array (row 0 = unknown word)."""
+
+    def __init__(self, analyzer):
+        self.index = {word: i for i, word in enumerate(analyzer.lexicon, start=1)}
+        self.valences = np.zeros(len(self.index) + 1)
+        self.valences[1:] = np.fromiter(analyzer.lexicon.values(), dtype=float, count=len(self.index))
+        self.emojis = frozenset(analyzer.emojis)
+
+_lexicon_arrays = None
+
+def _get_lexicon_arrays():
+    global _lexicon_arrays
+    if _lexicon_arrays is None:
+        with _analyzer_lock:
+            if _lexicon_arrays is None:
+                _lexicon_arrays = _LexiconArrays(get_analyzer())
+    return _lexicon_arrays
+
+def _tokenize(text):
+    """Split text the way VADER's SentiText does."""
+    tokens = []
+    for token in text.split():
+        stripped = token.strip(string.punctuation)
+        tokens.append(token if len(stripped) <= 2 else stripped)
+    return tokens
+
+def compound_scores(texts):
+    """Return VADER compound scores for texts as a float array.
+
+    Texts without any of VADER's contextual rules (negation, boosters, caps emphasis,
+    "but", idioms, ! and ?, emoji) are scored by summing lexicon valences with NumPy;
+    the rest go through polarity_scores. Both paths yield the same scores.
+    """
+    texts = list(texts)
+    lex = _get_lexicon_arrays()
+    index = lex.index
+    scores = np.zeros(len(texts))
+    fast_rows, row_ids, token_ids = [], [], []
+    for row, text in enumerate(texts):
+        text_lower = text.lower()
+        tokens = _tokenize(text)
+        lowered = tokens if text == text_lower else [t.lower() for t in tokens]
+        if ("!" in text or "?" in text or "n't" in text_lower
+                or not lex.emojis.isdisjoint(text)
+                or not _MODIFIER_WORDS.isdisjoint(lowered)
+                or (lowered is not tokens and any(t.isupper() and w in lex.index for t, w in zip(tokens, lowered)))
+                or _MODIFIER_PHRASES.search(" ".join(lowered))):
+            scores[row] = get_analyzer().polarity_scores(text)["compound"]
+            continue
+        fast_row = len(fast_rows)
+        fast_rows.append(row)
+        row_ids.extend([fast_row] * len(lowered))
+        token_ids.extend([index.get(w, 0) for w in lowered])
+    if fast_rows:
+        sums = np.bincount(np.array(row_ids, dtype=np.intp), weights=lex.valences[np.array(token_ids, dtype=np.intp)],
+                           minlength=len(fast_rows))
+        scores[fast_rows] = np.round(np.clip(sums / np.sqrt(sums * sums + 15), -1.0, 1.0), 4)
+    return scores
+
+def classify_texts(texts, keyword_mood, moods, router=None):
+    """Batch counterpart of analyze_mood.
+
+    keyword_mood(text_lower) returns a mood name or None; moods fixes the id order.
+    Texts without a keyword go through router (default: the shared MoodRouter).
+    Returns (mood ids as uint8 indices into moods, compound scores).
+    """
+    # Score each distinct normalized text once (as first seen); repeated prompts are common in logs
+    unique, originals = {}, []
+    rows = []
+    for text in texts:
+        key = normalize_text(text)
+        row = unique.setdefault(key, len(unique))
+        if row == len(originals):
+            originals.append(text)
+        rows.append(row)
+    inverse = np.array(rows, dtype=np.intp)
+    scores = compound_scores(originals)
+    mood_ids = (router or default_router()).route_ids(scores, moods)
+    for row, key in enumerate(unique):
+        mood = keyword_mood(key.lower())
+        if mood is not None:
+            mood_ids[row] = moods.index(mood)
+    return mood_ids[inverse], scores[inverse]
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Defaults can be overridden from .env; MOODY_REDIS_URL switches to the Redis backend
+DEFAULT_TTL = 3600
+DEFAULT_MAXSIZE = 256
+
+def request_key(endpoint, params):
+    """Build a cache key from an endpoint name and its request parameters.
+
+    Parameter order, seed order and float noise don't change the key.
+    """
+    normalized = {}
+    for name, value in params.items():
+        if isinstance(value, (list, tuple)):
+            value = sorted(value)
+        elif isinstance(value, float):
+            value = round(value, 3)
+        normalized[name] = value
+    return f"{endpoint}:{json.dumps(normalized, sort_keys=True)}"
+
+class MemoryCache:
+    """In-process LRU cache with a per-entry TTL and hit/miss counters."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries past maxsize."""
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+class RedisCache:
+    """Redis-backed cache shared across processes.
+
+    Entries expire through Redis TTLs; a sorted set of last-access times keeps the
+    number of entries bounded by evicting the least recently used ones.
+    """
+
+    def __init__(self, client, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, prefix="moody:cache:"):
+        self.client = client
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.prefix = prefix
+        self._index = f"{prefix}__lru__"
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if it is missing or expired."""
+        raw = self.client.get(self.prefix + key)
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.client.zadd(self._index, {key: time.time()})
+        return json.loads(raw)
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries past maxsize."""
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+        pipe.zadd(self._index, {key: time.time()})
+        pipe.zcard(self._index)
+        size = pipe.execute()[-1]
+        if size > self.maxsize:
+            stale = self.client.zpopmin(self._index, size - self.maxsize)
+            if stale:
+                self.client.delete(*(self.prefix + (k.decode() if isinstance(k, bytes) else k) for k, _ in stale))
+                with self._lock:
+                    self.evictions += len(stale)
+
+    def clear(self):
+        keys = self.client.zrange(self._index, 0, -1)
+        if keys:
+            self.client.delete(*(self.prefix + (k.decode() if isinstance(k, bytes) else k) for k in keys))
+        self.client.delete(self._index)
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": self.client.zcard(self._index),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+def cache_from_env():
+    """Create the cache configured by MOODY_REDIS_URL / MOODY_CACHE_TTL / MOODY_CACHE_SIZE."""
+    ttl = int(os.getenv("MOODY_CACHE_TTL", DEFAULT_TTL))
+    maxsize = int(os.getenv("MOODY_CACHE_SIZE", DEFAULT_MAXSIZE))
+    redis_url = os.getenv("MOODY_REDIS_URL")
+    if redis_url:
+        try:
+            import redis
+            client = redis.Redis.from_url(redis_url)
+            client.ping()
+            return RedisCache(client, maxsize=maxsize, ttl=ttl)
+        except Exception as e:
+            print(f"⚠️ Redis cache unavailable, using in-memory cache: {e}")
+    return MemoryCache(maxsize=maxsize, ttl=ttl)
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def default_cache():
+    """Return the process-wide recommendation cache, creating it on first use."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = cache_from_env()
+    return _default_cache
+
+class SingleFlight:
+    """Coalesces concurrent misses for the same key into one upstream call.
+
+    The first caller for a key runs the call; callers arriving while it is in
+    flight wait for and share its result (or exception) instead of calling too.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Return fn() for key, sharing one call among concurrent threads."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def do_async(self, key, coro_fn):
+        """Return await coro_fn() for key, sharing one call among concurrent tasks on this loop."""
+        flight = (asyncio.get_running_loop(), key)
+        future = self._async_calls.get(flight)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        future = self._async_calls[flight] = asyncio.get_running_loop().create_future()
+        try:
+            result = await coro_fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark it retrieved so a flight without waiters doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            del self._async_calls[flight]
+
+_flights = SingleFlight()
+
+def cached_recommendations(sp, cache=None, **params):
+    """Call sp.recommendations(**params), serving repeated mood profiles from the cache.
+
+    Concurrent misses for the same profile share one API call.
+    """
+    cache = cache or default_cache()
+    key = request_key("recommendations", params)
+    response = cache.get(key)
+    if response is None:
+        def fetch():
+            response = sp.recommendations(**params)
+            cache.set(key, response)
+            return response
+        response = _flights.do((id(cache), key), fetch)
+    return response
+
+async def cached_recommendations_async(client, cache=None, **params):
+    """Async counterpart of cached_recommendations for AsyncSpotify clients."""
+    cache = cache or default_cache()
+    key = request_key("recommendations", params)
+    response = cache.get(key)
+    if response is None:
+        async def fetch():
+            response = await client.recommendations(**params)
+            cache.set(key, response)
+            return response
+        response = await _flights.do_async((id(cache), key), fetch)
+    return response
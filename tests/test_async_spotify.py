@@ -0,0 +1,124 @@
+import asyncio
+import json
+import pytest
+
+from async_spotify import AsyncSpotify, SpotifyAPIError, iter_async, run_async
+from fake_spotify import FakeAuth, FakeSpotifyServer
+from rate_limit import ENDPOINT_LIMITS, RequestScheduler
+from seed_validation import SeedCache, validate_mood_seeds
+
+# Lift the client-side budgets so tests exercise the client, not the token buckets
+UNTHROTTLED = {endpoint: (1e6, 1e6) for endpoint in (*ENDPOINT_LIMITS, "tracks")}
+
+class CountingAuth(FakeAuth):
+    def __init__(self):
+        self.fetches = 0
+
+    def get_access_token(self, as_dict=False):
+        self.fetches += 1
+        return super().get_access_token(as_dict)
+
+@pytest.fixture(scope="module")
+def server():
+    server = FakeSpotifyServer(latency=0.0, jitter=0.0)
+    server.start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def client(server):
+    server.reset()
+    return AsyncSpotify(CountingAuth(), base_url=server.base_url, scheduler=RequestScheduler(limits=UNTHROTTLED))
+
+def test_read_endpoints_return_api_json(client, server):
+    assert run_async(client.me())["id"] == "fake-user"
+    rec = run_async(client.recommendations(seed_genres=["pop", "indie"], limit=7, target_energy=0.5))
+    assert len(rec["tracks"]) == 7
+    results = run_async(client.search(q="happy music", limit=5))
+    assert len(results["tracks"]["items"]) == 5
+    ids = [track["id"] for track in rec["tracks"][:3]]
+    assert [t["id"] for t in run_async(client.tracks([f"spotify:track:{i}" for i in ids]))["tracks"]] == ids
+    assert dict(server.requests) == {"me": 1, "recommendations": 1, "search": 1, "tracks": 1}
+
+def test_token_is_fetched_once_and_reused(client):
+    for _ in range(3):
+        run_async(client.me())
+    assert client.auth_manager.fetches == 1
+    assert client.calls["token"] == 1
+    assert client.calls["me"] == 3
+
+def test_playlist_create_and_add_items(client, server):
+    playlist = run_async(client.user_playlist_create("fake-user", "Moody", public=False))
+    assert playlist["name"] == "Moody"
+    run_async(client.playlist_add_items(playlist["id"], [f"spotify:track:{i}" for i in range(100)]))
+    assert server.playlists[playlist["id"]] == [f"spotify:track:{i}" for i in range(100)]
+
+def test_client_errors_raise_without_retries(client, server):
+    with pytest.raises(SpotifyAPIError) as excinfo:
+        run_async(client.tracks(["not-a-valid-id"]))
+    assert excinfo.value.http_status == 400
+    assert server.requests["tracks"] == 1
+
+def test_concurrent_requests_share_the_pool(client, server):
+    async def burst():
+        return await asyncio.gather(*(client.search(q=f"q{i}", limit=1) for i in range(20)))
+
+    assert len(run_async(burst())) == 20
+    assert server.requests["search"] == 20
+
+def test_rate_limited_requests_are_retried(server):
+    limited = FakeSpotifyServer(latency=0.0, jitter=0.0, rate_limit=5, retry_after=1)
+    limited.start()
+    try:
+        client = AsyncSpotify(FakeAuth(), base_url=limited.base_url, scheduler=RequestScheduler(limits=UNTHROTTLED))
+
+        async def burst():
+            return await asyncio.gather(*(client.me() for _ in range(8)))
+
+        assert all(user["id"] == "fake-user" for user in run_async(burst()))
+        assert limited.statuses[429] > 0
+        assert limited.statuses[200] == 8
+    finally:
+        limited.stop()
+
+def test_iter_async_streams_from_sync_code(client):
+    async def pages():
+        for offset in (0, 1):
+            yield await client.search(q="x", limit=1, offset=offset)
+
+    assert len(list(iter_async(pages()))) == 2
+
+def test_seed_validity_persists_across_runs(client, server, tmp_path):
+    path = str(tmp_path / "seeds.json")
+    settings = {"happy": {"seed_tracks": ["a" * 22, "bad"], "seed_genres": ["pop", "not-a-genre"]}}
+    cache = SeedCache(path)
+    assert run_async(validate_mood_seeds(client, settings, cache)) == {"happy": ["bad", "not-a-genre"]}
+    cache.save()
+
+    # A fresh process reads the saved results and makes no Spotify calls
+    server.reset()
+    settings = {"happy": {"seed_tracks": ["a" * 22, "bad"], "seed_genres": ["pop", "not-a-genre"]}}
+    run_async(validate_mood_seeds(client, settings, SeedCache(path)))
+    assert settings["happy"] == {"seed_tracks": ["a" * 22], "seed_genres": ["pop"]}
+    assert sum(server.requests.values()) == 0
+
+def test_batch_reports_bad_lines_and_keeps_going(client, tmp_path):
+    import io
+    import moody
+
+    path = tmp_path / "prompts.jsonl"
+    path.write_text('"best day ever"\n{"id": 7}\n\n42\n[1, 2]\nnot json\n{"prompt": "so sad and lonely", "id": 8}\n')
+    out = io.StringIO()
+    counts = run_async(moody.generate_batch(client, moody.read_prompts(str(path)), out))
+    assert counts["rejected"] == 4 and counts["playlists"] == 2
+    results = {row["line"]: row for row in map(json.loads, out.getvalue().splitlines())}
+    assert sorted(results) == [1, 2, 4, 5, 6, 7]
+    assert results[2]["id"] == 7 and results[2]["error"] == 'missing "prompt" string'
+    assert results[6]["error"].startswith("invalid JSON")
+    assert results[7]["id"] == 8 and results[7]["playlist"] and results[7]["error"] is None
+
+def test_batch_rejects_concurrency_below_one():
+    import moody
+
+    with pytest.raises(SystemExit):
+        moody.main(["--batch", "-", "--concurrency", "0"])
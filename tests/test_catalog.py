@@ -0,0 +1,84 @@
+import json
+import numpy as np
+import pytest
+
+import catalog
+from catalog import open_catalog, write_catalog
+from track_index import TrackIndex
+
+def synthetic_tracks(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"uri": f"spotify:track:{i:022d}", "name": f"Song {i} ♪", "artist": f"Artist {i % 37}",
+         "valence": float(v), "energy": float(e), "popularity": int(p)}
+        for i, (v, e, p) in enumerate(zip(rng.random(count), rng.random(count), rng.integers(0, 101, count)))
+    ]
+
+@pytest.fixture(scope="module")
+def tracks():
+    return synthetic_tracks(5000)
+
+@pytest.fixture(scope="module")
+def mapped(tracks, tmp_path_factory):
+    path = tmp_path_factory.mktemp("catalog") / "tracks.moodcat"
+    assert write_catalog(str(path), tracks) == len(tracks)
+    return open_catalog(str(path))
+
+@pytest.mark.parametrize("query", [
+    {"limit": 15, "target_valence": 0.2, "target_energy": 0.3, "max_valence": 0.4, "min_energy": 0.1, "max_energy": 0.5},
+    {"limit": 15, "target_valence": 0.9, "target_energy": 0.85, "min_valence": 0.8, "min_energy": 0.7},
+    {"limit": 40, "target_valence": 0.5, "target_energy": 0.5, "min_popularity": 80},
+])
+def test_recommendations_match_track_index(tracks, mapped, query):
+    index = TrackIndex.from_tracks([dict(t, id=t["uri"].rsplit(":", 1)[-1]) for t in tracks])
+    assert mapped.recommendations(**query) == index.recommendations(**query)
+
+def test_row_for_uri_finds_every_track(tracks, mapped):
+    for track in tracks[::97]:
+        row = mapped.row_for_uri(track["uri"])
+        assert mapped.track(row)["uri"] == track["uri"]
+        assert mapped.track(row)["name"] == track["name"]
+        assert mapped.row_for_uri(track["uri"].rsplit(":", 1)[-1]) == row
+
+def test_row_for_uri_rejects_unknown_and_overlong_ids(tracks, mapped):
+    known = tracks[0]["uri"].rsplit(":", 1)[-1]
+    assert mapped.row_for_uri("spotify:track:" + "z" * 22) is None
+    # Longer ids must not be truncated onto a stored prefix
+    assert mapped.row_for_uri(known + "x") is None
+    assert mapped.row_for_uri("") is None
+    assert mapped.row_for_uri("spotify:track:ünïcode") is None
+
+def test_short_ids_are_not_prefix_matched(tmp_path):
+    path = str(tmp_path / "short.moodcat")
+    write_catalog(path, [{"id": "abc", "name": "A", "artist": "B", "valence": 0.5, "energy": 0.5},
+                         {"id": "ab", "name": "C", "artist": "D", "valence": 0.1, "energy": 0.1}])
+    mapped = open_catalog(path)
+    assert mapped.track(mapped.row_for_uri("abc"))["name"] == "A"
+    assert mapped.track(mapped.row_for_uri("ab"))["name"] == "C"
+    assert mapped.row_for_uri("abcd") is None
+
+def test_empty_catalog(tmp_path):
+    path = str(tmp_path / "empty.moodcat")
+    assert write_catalog(path, []) == 0
+    mapped = open_catalog(path)
+    assert len(mapped) == 0
+    assert mapped.row_for_uri("abc") is None
+    assert mapped.recommendations(limit=5) == {"tracks": []}
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.moodcat"
+    path.write_bytes(b"\0" * 256)
+    with pytest.raises(ValueError):
+        open_catalog(str(path))
+
+def test_build_cli_skips_tracks_without_features(tracks, tmp_path, capsys):
+    source = tmp_path / "tracks.jsonl"
+    source.write_text("\n".join(json.dumps(t) for t in tracks[:50] + [{"uri": "spotify:track:nofeatures"}]) + "\n")
+    output = str(tmp_path / "built.moodcat")
+    catalog.main(["build", str(source), output])
+    assert "Skipping 1 tracks" in capsys.readouterr().err
+    built = open_catalog(output)
+    assert len(built) == 50
+    assert built.row_for_uri("spotify:track:nofeatures") is None
+    catalog.main(["info", output])
+    assert "50 tracks" in capsys.readouterr().out
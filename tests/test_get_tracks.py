@@ -0,0 +1,58 @@
+import threading
+import time
+
+import moody
+from rate_limit import RequestScheduler, ScheduledSpotify
+
+class SlowSearchSpotify:
+    """Stub whose recommendations fail and whose searches take `latency` seconds.
+
+    Consecutive terms share one track, so merging has duplicates to drop.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.active = self.max_active = 0
+        self._lock = threading.Lock()
+
+    def recommendations(self, **params):
+        raise RuntimeError("recommendations unavailable")
+
+    def search(self, q, type, limit, market):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.latency)
+        with self._lock:
+            self.active -= 1
+        names = [f"{q} {i}" for i in range(limit - 1)] + ["shared"]
+        return {"tracks": {"items": [
+            {"name": name, "artists": [{"name": "Stub"}], "external_urls": {"spotify": f"https://open.spotify.com/track/{name}"},
+             "uri": f"spotify:track:{name}"}
+            for name in names
+        ]}}
+
+def test_fallback_searches_run_concurrently_and_merge_by_uri():
+    terms = ["happy songs", "upbeat music", "joyful"]
+    stub = SlowSearchSpotify(latency=0.2)
+    sp = ScheduledSpotify(stub, RequestScheduler())
+    started = time.perf_counter()
+    tracks = moody.get_tracks(sp, {"seed_tracks": [], "search_terms": terms})
+    seconds = time.perf_counter() - started
+
+    # One search round trip instead of three back to back (plus the old 0.2 s sleeps)
+    assert seconds < 0.45
+    assert stub.max_active == len(terms)
+    uris = [t["uri"] for t in tracks]
+    assert len(uris) == len(set(uris)) == len(terms) * 4 + 1
+    # Tracks keep term order; the shared track is kept once
+    assert uris[:4] == [f"spotify:track:happy songs {i}" for i in range(4)]
+
+def test_fallback_searches_respect_the_search_budget():
+    terms = [f"term {i}" for i in range(8)]
+    stub = SlowSearchSpotify(latency=0.0)
+    sp = ScheduledSpotify(stub, RequestScheduler(limits={"search": (10, 2)}))
+    started = time.perf_counter()
+    moody.get_tracks(sp, {"seed_tracks": [], "search_terms": terms})
+    # A burst of 2, then 10 requests/second for the other 6
+    assert time.perf_counter() - started >= 0.5
@@ -0,0 +1,51 @@
+import pytest
+
+from async_spotify import AsyncSpotify, run_async
+from fake_spotify import FakeAuth, FakeSpotifyServer
+from playlist_writer import add_items_bulk, add_items_bulk_sync
+from rate_limit import ENDPOINT_LIMITS, RequestScheduler, scheduled_spotipy
+
+URIS = [f"spotify:track:{i:022d}" for i in range(1050)]
+UNTHROTTLED = {endpoint: (1e6, 1e6) for endpoint in ENDPOINT_LIMITS}
+
+@pytest.fixture
+def server():
+    # Enough budget for a few batches at a time, so the writers have to ride out 429s
+    server = FakeSpotifyServer(latency=0.0, jitter=0.0, rate_limit=8, retry_after=1)
+    server.start()
+    yield server
+    server.stop()
+
+def _assert_complete(server, playlist_id, report):
+    assert report["items"] == len(URIS)
+    assert report["batches"] == 11
+    assert server.playlists[playlist_id] == URIS
+    assert server.statuses[429] > 0
+    # Rejected requests add nothing: every URI arrived exactly once, in order
+    assert server.requests["playlist_add_items"] - server.statuses[429] == 11
+
+def test_add_items_bulk_batches_in_order_through_429s(server):
+    client = AsyncSpotify(FakeAuth(), base_url=server.base_url, scheduler=RequestScheduler(limits=UNTHROTTLED))
+    playlist = run_async(client.user_playlist_create("fake-user", "bulk"))
+    report = run_async(add_items_bulk(client, playlist["id"], URIS))
+    _assert_complete(server, playlist["id"], report)
+
+def test_add_items_bulk_sync_batches_in_order_through_429s(server):
+    sp = scheduled_spotipy(FakeAuth(), RequestScheduler(limits=UNTHROTTLED), server.base_url)
+    playlist = sp.user_playlist_create("fake-user", "bulk")
+    report = add_items_bulk_sync(sp, playlist["id"], URIS)
+    _assert_complete(server, playlist["id"], report)
+
+def test_server_rejects_oversized_batches(server):
+    client = AsyncSpotify(FakeAuth(), base_url=server.base_url, scheduler=RequestScheduler(limits=UNTHROTTLED))
+    playlist = run_async(client.user_playlist_create("fake-user", "bulk"))
+    with pytest.raises(Exception, match="400"):
+        run_async(add_items_bulk(client, playlist["id"], URIS[:101], batch_size=101))
+    assert server.playlists[playlist["id"]] == []
+
+def test_concurrent_batches_add_every_item(server):
+    client = AsyncSpotify(FakeAuth(), base_url=server.base_url, scheduler=RequestScheduler(limits=UNTHROTTLED))
+    playlist = run_async(client.user_playlist_create("fake-user", "bulk"))
+    report = run_async(add_items_bulk(client, playlist["id"], URIS, concurrency=4))
+    assert report["batches"] == 11
+    assert sorted(server.playlists[playlist["id"]]) == URIS
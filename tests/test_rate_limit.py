@@ -0,0 +1,119 @@
+import time
+import pytest
+from spotipy import SpotifyException
+
+from fake_spotify import FakeAuth, FakeSpotifyServer
+from rate_limit import (ENDPOINT_LIMITS, MAX_BACKOFF, CircuitOpenError, RequestScheduler, TokenBucket, retry_delay,
+                        scheduled_spotipy)
+
+class APIError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"http status: {status}")
+        self.http_status = status
+        self.retry_after = retry_after
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def scheduler(clock, **kwargs):
+    return RequestScheduler(limits={}, clock=clock, sleep=clock.sleep, **kwargs)
+
+def failing(error):
+    def call():
+        raise error
+    return call
+
+def test_retry_delay_follows_short_retry_after():
+    assert retry_delay(APIError(429, retry_after=3), 0) == 3.0
+
+def test_retry_delay_gives_up_on_long_bans():
+    assert retry_delay(APIError(429, retry_after=3600), 0) is None
+    assert retry_delay(APIError(429, retry_after=MAX_BACKOFF), 0) == MAX_BACKOFF
+
+def test_retry_delay_skips_client_errors():
+    assert retry_delay(APIError(401), 0) is None
+    assert retry_delay(APIError(404), 0) is None
+    assert 0 <= retry_delay(APIError(503), 2) <= 2.0
+
+def test_long_ban_fails_fast():
+    clock = FakeClock()
+    with pytest.raises(APIError):
+        scheduler(clock).call("recommendations", failing(APIError(429, retry_after=3600)))
+    assert clock.now < MAX_BACKOFF
+
+def test_client_errors_do_not_open_the_breaker():
+    clock = FakeClock()
+    sched = scheduler(clock, breaker_threshold=3)
+    for _ in range(5):
+        with pytest.raises(APIError):
+            sched.call("user_playlist_create", failing(APIError(401)))
+    assert sched.call("user_playlist_create", lambda: "ok") == "ok"
+    assert not sched.stats()["user_playlist_create"]["circuit_open"]
+
+def test_service_failures_open_the_breaker_until_reset():
+    clock = FakeClock()
+    sched = scheduler(clock, max_retries=0, breaker_threshold=3, breaker_reset=60)
+    for _ in range(3):
+        with pytest.raises(APIError):
+            sched.call("recommendations", failing(APIError(503)))
+    with pytest.raises(CircuitOpenError):
+        sched.call("recommendations", lambda: "ok")
+    clock.now += 60
+    assert sched.call("recommendations", lambda: "ok") == "ok"
+
+def test_transport_errors_count_as_service_failures():
+    clock = FakeClock()
+    sched = scheduler(clock, breaker_threshold=2)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            sched.call("search", failing(ConnectionError("reset")))
+    with pytest.raises(CircuitOpenError):
+        sched.call("search", lambda: "ok")
+
+def test_token_bucket_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.now == pytest.approx(1.0)
+
+@pytest.fixture
+def banning_server():
+    # One request, then 429 with a Retry-After far above MAX_BACKOFF
+    server = FakeSpotifyServer(latency=0.0, jitter=0.0, rate_limit=1, retry_after=3600)
+    server.start()
+    yield server
+    server.stop()
+
+def test_spotipy_long_ban_fails_fast_with_the_real_status(banning_server):
+    sched = RequestScheduler()
+    sp = scheduled_spotipy(FakeAuth(), sched, banning_server.base_url)
+    assert sp.me()["id"] == "fake-user"
+    started = time.perf_counter()
+    with pytest.raises(SpotifyException) as excinfo:
+        sp.me()
+    assert time.perf_counter() - started < 1
+    assert excinfo.value.http_status == 429
+    assert excinfo.value.headers["Retry-After"] == "3600"
+    assert sched.stats()["me"]["retries"] == 0
+
+def test_spotipy_server_errors_keep_their_status():
+    server = FakeSpotifyServer(latency=0.0, jitter=0.0, error_rate=1.0)
+    server.start()
+    try:
+        sched = RequestScheduler(max_retries=0)
+        sp = scheduled_spotipy(FakeAuth(), sched, server.base_url)
+        with pytest.raises(SpotifyException) as excinfo:
+            sp.me()
+        assert excinfo.value.http_status == 503
+        # Only 429s throttle the bucket
+        assert sched.stats()["me"]["rate"] == ENDPOINT_LIMITS["me"][0]
+    finally:
+        server.stop()
@@ -0,0 +1,35 @@
+import pytest
+
+import moody_core
+import sentiment
+
+EMPHATIC = ["This is GOOD!!!", "terrible day!!!", "I AM GOOD", "i am GOOD", "ok.", "so VERY happy", "what a day??"]
+
+@pytest.mark.parametrize("text", EMPHATIC)
+def test_memo_score_matches_vader_on_the_original_text(text):
+    expected = sentiment.get_analyzer().polarity_scores(text)["compound"]
+    memo = sentiment.ScoreMemo()
+    assert sentiment.memo_score(text, memo)[1] == expected
+    # A hit returns the same score
+    assert sentiment.memo_score(text, memo)[1] == expected
+
+def test_normalize_text_folds_only_what_vader_ignores():
+    key = sentiment.normalize_text
+    assert key("  feeling   great today. ") == key("Feeling great today") == "feeling great today"
+    assert key("This is GOOD!!!") != key("this is good")
+    assert key("This is good!!!") != key("this is good")
+    assert key("ok.") != key("ok")
+
+def test_variants_sharing_a_key_share_a_score():
+    analyzer = sentiment.get_analyzer()
+    memo = sentiment.ScoreMemo()
+    for text in ["Feeling great today", "feeling  great today.", "FEELING great TODAY"]:
+        assert sentiment.memo_score(text, memo)[1] == analyzer.polarity_scores(text)["compound"]
+    assert memo.stats()["size"] <= 2
+
+def test_classify_texts_matches_analyze_mood():
+    texts = EMPHATIC + ["my life is this miserable", "we had this wonderful evening", "pumped   for the party."]
+    mood_ids, scores = moody_core.analyze_moods(texts)
+    assert [moody_core.MOODS[i] for i in mood_ids] == [moody_core.analyze_mood(text)[0] for text in texts]
+    analyzer = sentiment.get_analyzer()
+    assert list(scores) == [analyzer.polarity_scores(text)["compound"] for text in texts]
@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+import pytest
+
+from spotify_cache import (MemoryCache, RedisCache, SingleFlight, cached_recommendations,
+                           cached_recommendations_async, request_key)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class CountingSpotify:
+    """Stub whose recommendations count calls and take `latency` seconds."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def recommendations(self, **params):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return {"tracks": [{"id": "t1", "params": sorted(params)}]}
+
+class AsyncCountingSpotify(CountingSpotify):
+    async def recommendations(self, **params):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return {"tracks": [{"id": "t1"}]}
+
+def test_request_key_ignores_order_and_float_noise():
+    a = request_key("recommendations", {"seed_genres": ["pop", "indie"], "target_energy": 0.6500001, "limit": 15})
+    b = request_key("recommendations", {"limit": 15, "target_energy": 0.65, "seed_genres": ["indie", "pop"]})
+    assert a == b
+    assert a != request_key("recommendations", {"seed_genres": ["pop"], "target_energy": 0.65, "limit": 15})
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+def test_memory_cache_expires_after_ttl():
+    clock = FakeClock()
+    cache = MemoryCache(ttl=10, clock=clock)
+    cache.set("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+def test_memory_cache_counters():
+    cache = MemoryCache()
+    cache.get("missing")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+@pytest.fixture
+def redis_client():
+    # fakeredis is a test-only dependency; the in-memory cache tests run without it
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeRedis()
+
+def test_redis_cache_round_trip_and_ttl(redis_client):
+    cache = RedisCache(redis_client, ttl=60)
+    cache.set("a", {"tracks": [1, 2]})
+    assert cache.get("a") == {"tracks": [1, 2]}
+    assert 0 < redis_client.ttl("moody:cache:a") <= 60
+    redis_client.delete("moody:cache:a")
+    assert cache.get("a") is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+def test_redis_cache_evicts_least_recently_used(redis_client):
+    cache = RedisCache(redis_client, maxsize=2)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    assert cache.get("a") == 1
+    time.sleep(0.01)
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+def test_redis_cache_is_shared_between_instances(redis_client):
+    RedisCache(redis_client).set("a", [1])
+    assert RedisCache(redis_client).get("a") == [1]
+
+def test_redis_cache_clear(redis_client):
+    cache = RedisCache(redis_client)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.clear()
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+def test_cached_recommendations_serves_repeats_from_cache():
+    sp, cache = CountingSpotify(), MemoryCache()
+    first = cached_recommendations(sp, cache, seed_genres=["pop"], limit=15)
+    assert cached_recommendations(sp, cache, limit=15, seed_genres=["pop"]) == first
+    assert sp.calls == 1
+
+def test_concurrent_misses_share_one_call():
+    sp, cache = CountingSpotify(latency=0.1), MemoryCache()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cached_recommendations(sp, cache, seed_genres=["pop"])))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sp.calls == 1
+    assert len(results) == 8 and all(result == results[0] for result in results)
+
+def test_concurrent_async_misses_share_one_call():
+    client, cache = AsyncCountingSpotify(latency=0.05), MemoryCache()
+
+    async def run():
+        return await asyncio.gather(*(cached_recommendations_async(client, cache, seed_genres=["pop"]) for _ in range(8)))
+
+    results = asyncio.run(run())
+    assert client.calls == 1
+    assert all(result == results[0] for result in results)
+
+def test_single_flight_shares_errors_and_forgets_finished_calls():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        return await asyncio.gather(*(flights.do_async("k", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flights.coalesced == 2
+    assert flights.do("k", lambda: 42) == 42
@@ -0,0 +1,72 @@
+import time
+import numpy as np
+import pytest
+
+import moody
+import moody_core
+from track_index import TrackIndex
+
+CATALOG_SIZE = 1_000_000
+
+@pytest.fixture(scope="module")
+def catalog():
+    rng = np.random.default_rng(0)
+    ids = np.char.add("track", np.arange(CATALOG_SIZE).astype(str))
+    return TrackIndex(ids, ids, np.char.add("artist", (np.arange(CATALOG_SIZE) % 5000).astype(str)),
+                      rng.random(CATALOG_SIZE, dtype=np.float32), rng.random(CATALOG_SIZE, dtype=np.float32),
+                      rng.integers(0, 101, CATALOG_SIZE))
+
+def brute_force(index, target_valence, target_energy, k, valence_range, energy_range, min_popularity=0):
+    mask = ((index.valence >= valence_range[0]) & (index.valence <= valence_range[1])
+            & (index.energy >= energy_range[0]) & (index.energy <= energy_range[1])
+            & (index.popularity >= min_popularity))
+    rows = np.flatnonzero(mask)
+    dists = (index.valence[rows] - target_valence) ** 2 + (index.energy[rows] - target_energy) ** 2
+    return rows[np.argsort(dists, kind="stable")[:k]]
+
+@pytest.mark.parametrize("mood", list(moody_core.MOOD_SETTINGS))
+def test_nearest_matches_brute_force(catalog, mood):
+    config = moody_core.MOOD_SETTINGS[mood]
+    params = moody_core.recommendation_params(config)
+    args = (params["target_valence"], params["target_energy"], 15, config["valence_range"], config["energy_range"])
+    rows = catalog.nearest(*args)
+    assert len(rows) == 15
+    np.testing.assert_array_equal(np.sort(rows), np.sort(brute_force(catalog, *args)))
+    assert np.all((catalog.valence[rows] >= config["valence_range"][0]) & (catalog.valence[rows] <= config["valence_range"][1]))
+
+def test_nearest_with_popularity_floor_and_off_center_target(catalog):
+    args = (0.05, 0.95, 50, (0.0, 0.3), (0.6, 1.0), 90)
+    rows = catalog.nearest(*args)
+    np.testing.assert_array_equal(np.sort(rows), np.sort(brute_force(catalog, *args)))
+    assert np.all(catalog.popularity[rows] >= 90)
+
+def test_lookups_are_sub_millisecond(catalog):
+    config = moody_core.MOOD_SETTINGS["happy"]
+    params = moody_core.recommendation_params(config)
+    timings = []
+    for _ in range(20):
+        started = time.perf_counter()
+        catalog.nearest(params["target_valence"], params["target_energy"], k=15,
+                        valence_range=config["valence_range"], energy_range=config["energy_range"])
+        timings.append(time.perf_counter() - started)
+    assert min(timings) < 0.001
+
+def test_save_load_round_trip(tmp_path):
+    index = TrackIndex.from_tracks([
+        {"id": f"t{i}", "name": f"Song {i}", "artist": "A", "valence": i / 10, "energy": 1 - i / 10, "popularity": i}
+        for i in range(10)
+    ])
+    index.save(tmp_path / "index.npz")
+    loaded = TrackIndex.load(str(tmp_path / "index.npz"))
+    assert len(loaded) == 10
+    assert loaded.recommendations(limit=3, target_valence=0.5, target_energy=0.5) == index.recommendations(
+        limit=3, target_valence=0.5, target_energy=0.5)
+
+def test_index_is_a_drop_in_source_for_get_tracks(catalog):
+    class NoSpotify:
+        def __getattr__(self, name):
+            raise AssertionError(f"unexpected Spotify call: {name}")
+
+    tracks = moody.get_tracks(NoSpotify(), moody.MOOD_SETTINGS["sad"], index=catalog)
+    assert len(tracks) == 15
+    assert all(t["uri"].startswith("spotify:track:track") for t in tracks)
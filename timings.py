@@ -0,0 +1,123 @@
+"""Stage timers for the playlist pipeline.
+
+Enable with MOODY_TIMINGS=1. Each `with span("stage"):` block then records its
+wall time; percentiles are computed over the most recent WINDOW samples per
+stage. MOODY_TIMINGS_PATH exports at exit: Prometheus text for a .prom path,
+JSON lines (appended) otherwise. Disabled spans are a shared no-op context.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+WINDOW = 10000
+QUANTILES = (0.5, 0.95, 0.99)
+
+_NOOP = nullcontext()
+
+class _Span:
+    __slots__ = ("registry", "name", "started")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.record(self.name, time.perf_counter() - self.started)
+        return False
+
+class Timings:
+    """Per-stage latency samples with count/sum totals and percentile summaries."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def record(self, name, seconds):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._totals[name] = [0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def snapshot(self):
+        """Return {stage: {count, sum, p50, p95, p99}} with times in seconds."""
+        import numpy as np
+        with self._lock:
+            samples = {name: np.array(values) for name, values in self._samples.items()}
+            totals = {name: tuple(values) for name, values in self._totals.items()}
+        summary = {}
+        for name, values in samples.items():
+            count, total = totals[name]
+            summary[name] = {"count": count, "sum": total}
+            for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                summary[name][f"p{round(q * 100)}"] = float(value)
+        return summary
+
+    def prometheus_text(self, metric="moody_stage_seconds"):
+        """Render the snapshot as a Prometheus summary in the text exposition format."""
+        lines = [f"# HELP {metric} Wall time of playlist pipeline stages.", f"# TYPE {metric} summary"]
+        for name, stats in sorted(self.snapshot().items()):
+            for q in QUANTILES:
+                lines.append(f'{metric}{{stage="{name}",quantile="{q}"}} {stats[f"p{round(q * 100)}"]:.6f}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {stats["sum"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write Prometheus text to a .prom path, or append one JSON line per stage to any other path."""
+        if path.endswith(".prom"):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            return
+        now = time.time()
+        with open(path, "a", encoding="utf-8") as f:
+            for name, stats in sorted(self.snapshot().items()):
+                f.write(json.dumps({"ts": now, "stage": name, **stats}) + "\n")
+
+def _timings_from_env():
+    if os.getenv("MOODY_TIMINGS", "").lower() not in ("1", "true", "yes", "on"):
+        return None
+    timings = Timings()
+    path = os.getenv("MOODY_TIMINGS_PATH")
+    if path:
+        atexit.register(timings.export, path)
+    return timings
+
+# Read on first use, so settings loaded by load_dotenv() after import still apply
+_timings = None
+_configured = False
+_configure_lock = threading.Lock()
+
+def get_timings():
+    """Return the process-wide Timings, or None when MOODY_TIMINGS is off."""
+    global _timings, _configured
+    if not _configured:
+        with _configure_lock:
+            if not _configured:
+                _timings = _timings_from_env()
+                _configured = True
+    return _timings
+
+def span(name):
+    """Context manager timing one pipeline stage; a no-op when timings are disabled."""
+    timings = _timings if _configured else get_timings()
+    if timings is None:
+        return _NOOP
+    return timings.span(name)
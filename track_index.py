@@ -0,0 +1,147 @@
+import os
+import numpy as np
+
+GRID_SIZE = 64
+
+class TrackIndex:
+    """Columnar in-memory track catalog with a uniform valence × energy grid index.
+
+    Rows are stored sorted by grid cell, so each cell is a contiguous slice; nearest
+    lookups scan rings of cells outward from the target and stop as soon as no
+    unvisited cell can hold a closer track.
+    """
+
+    def __init__(self, ids, names, artists, valence, energy, popularity, grid_size=GRID_SIZE, cell_starts=None):
+        self.grid_size = grid_size
+        if cell_starts is not None:
+            # Columns are already in cell order (e.g. views over a mapped catalog file)
+            self.ids, self.names, self.artists = ids, names, artists
+            self.valence, self.energy, self.popularity = valence, energy, popularity
+            self.cell_starts = cell_starts
+            return
+        valence = np.asarray(valence, dtype=np.float32)
+        energy = np.asarray(energy, dtype=np.float32)
+        cells = self._cell(valence) * grid_size + self._cell(energy)
+        order = np.argsort(cells, kind="stable")
+        self.ids = np.asarray(ids)[order]
+        self.names = np.asarray(names)[order]
+        self.artists = np.asarray(artists)[order]
+        self.valence = valence[order]
+        self.energy = energy[order]
+        self.popularity = np.asarray(popularity, dtype=np.uint8)[order]
+        # cell_starts[c]:cell_starts[c + 1] is the row slice of cell c
+        self.cell_starts = np.searchsorted(cells[order], np.arange(grid_size * grid_size + 1))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _cell(self, values):
+        return np.clip((np.asarray(values) * self.grid_size).astype(np.intp), 0, self.grid_size - 1)
+
+    @classmethod
+    def from_tracks(cls, tracks, grid_size=GRID_SIZE):
+        """Build an index from dicts with id, name, artist, valence, energy and popularity."""
+        tracks = list(tracks)
+        return cls(
+            ids=[t["id"] for t in tracks],
+            names=[t["name"] for t in tracks],
+            artists=[t["artist"] for t in tracks],
+            valence=[t["valence"] for t in tracks],
+            energy=[t["energy"] for t in tracks],
+            popularity=[t.get("popularity", 0) for t in tracks],
+            grid_size=grid_size,
+        )
+
+    def save(self, path):
+        np.savez(path, ids=self.ids, names=self.names, artists=self.artists, valence=self.valence,
+                 energy=self.energy, popularity=self.popularity, grid_size=self.grid_size)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["ids"], data["names"], data["artists"], data["valence"], data["energy"],
+                       data["popularity"], grid_size=int(data["grid_size"]))
+
+    def _ring_cells(self, v_cell, e_cell, ring, v_lo, v_hi, e_lo, e_hi):
+        """Yield grid cells inside the bounds at Chebyshev distance ring from (v_cell, e_cell)."""
+        for v in range(max(v_lo, v_cell - ring), min(v_hi, v_cell + ring) + 1):
+            if abs(v - v_cell) == ring:
+                energies = range(max(e_lo, e_cell - ring), min(e_hi, e_cell + ring) + 1)
+            else:
+                energies = [e for e in (e_cell - ring, e_cell + ring) if e_lo <= e <= e_hi]
+            for e in energies:
+                yield v * self.grid_size + e
+
+    def nearest(self, target_valence, target_energy, k=15, valence_range=(0.0, 1.0), energy_range=(0.0, 1.0), min_popularity=0):
+        """Return row numbers of the k tracks inside the ranges closest to the target, nearest first."""
+        v_lo, v_hi = self._cell(valence_range[0]), self._cell(valence_range[1])
+        e_lo, e_hi = self._cell(energy_range[0]), self._cell(energy_range[1])
+        v_cell, e_cell = self._cell(target_valence), self._cell(target_energy)
+        cell_width = 1.0 / self.grid_size
+        rows, dists = [], []
+        found = 0
+        max_ring = max(v_cell - v_lo, v_hi - v_cell, e_cell - e_lo, e_hi - e_cell)
+        for ring in range(max_ring + 1):
+            for cell in self._ring_cells(v_cell, e_cell, ring, v_lo, v_hi, e_lo, e_hi):
+                start, stop = self.cell_starts[cell], self.cell_starts[cell + 1]
+                if start == stop:
+                    continue
+                val, en = self.valence[start:stop], self.energy[start:stop]
+                mask = ((val >= valence_range[0]) & (val <= valence_range[1])
+                        & (en >= energy_range[0]) & (en <= energy_range[1])
+                        & (self.popularity[start:stop] >= min_popularity))
+                hits = np.flatnonzero(mask)
+                if hits.size:
+                    rows.append(hits + start)
+                    dists.append((val[hits] - target_valence) ** 2 + (en[hits] - target_energy) ** 2)
+                    found += hits.size
+            # Every track in a later ring is at least ring * cell_width from the target
+            if found >= k:
+                all_dists = np.concatenate(dists)
+                kth = np.partition(all_dists, k - 1)[k - 1]
+                if kth <= (ring * cell_width) ** 2:
+                    break
+        if not rows:
+            return np.empty(0, dtype=np.intp)
+        all_rows, all_dists = np.concatenate(rows), np.concatenate(dists)
+        best = np.argsort(all_dists, kind="stable")[:k]
+        return all_rows[best]
+
+    def track(self, row):
+        """Return a row as a Spotify-style track object."""
+        track_id = self.ids[row]
+        track_id = track_id.decode("ascii") if isinstance(track_id, bytes) else str(track_id)
+        return {
+            "id": track_id,
+            "name": str(self.names[row]),
+            "artists": [{"name": str(self.artists[row])}],
+            "uri": f"spotify:track:{track_id}",
+            "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+            "preview_url": None,
+            "popularity": int(self.popularity[row]),
+            "valence": float(self.valence[row]),
+            "energy": float(self.energy[row]),
+        }
+
+    def recommendations(self, limit=20, target_valence=None, target_energy=None, min_valence=0.0, max_valence=1.0,
+                        min_energy=0.0, max_energy=1.0, min_popularity=0, **seeds):
+        """Answer a sp.recommendations call from the local catalog; seeds are ignored."""
+        valence = target_valence if target_valence is not None else (min_valence + max_valence) / 2
+        energy = target_energy if target_energy is not None else (min_energy + max_energy) / 2
+        rows = self.nearest(valence, energy, k=limit, valence_range=(min_valence, max_valence),
+                            energy_range=(min_energy, max_energy), min_popularity=min_popularity)
+        return {"tracks": [self.track(row) for row in rows]}
+
+def load_track_index(path=None):
+    """Load the catalog named by MOODY_TRACK_INDEX (.npz or .moodcat), or return None when none is configured."""
+    path = path or os.getenv("MOODY_TRACK_INDEX")
+    if not path:
+        return None
+    try:
+        if path.endswith(".moodcat"):
+            from catalog import open_catalog
+            return open_catalog(path)
+        return TrackIndex.load(path)
+    except Exception as e:
+        print(f"⚠️ Couldn't load track index {path}: {e}")
+        return None
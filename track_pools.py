@@ -0,0 +1,179 @@
+"""Warm per-mood pools of candidate tracks, refreshed in the background.
+
+Recommendations for a mood barely depend on who asks, so instead of one round
+trip per click a PoolRefresher rebuilds each mood's pool every REFRESH_SECONDS
+on the shared event loop and TrackPools persists them to disk. A request just
+samples from its mood's pool, which needs no Spotify read call; a pool that is
+past its age keeps serving until the refresh replaces it.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from async_spotify import submit_async
+
+# Defaults can be overridden from .env
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "moody", "pools.json")
+POOL_SIZE = 100
+SAMPLE_SIZE = 15
+REFRESH_SECONDS = 6 * 3600
+RETRY_SECONDS = 60
+
+# Fields the app reads from a track; the rest (album, available_markets, ...) isn't stored
+_TRACK_FIELDS = ("id", "name", "uri", "external_urls", "preview_url", "popularity")
+
+def slim_track(track):
+    """Keep only the fields the playlist pipeline uses."""
+    slim = {field: track.get(field) for field in _TRACK_FIELDS}
+    slim["artists"] = [{"name": artist.get("name")} for artist in track.get("artists", [])]
+    return slim
+
+class TrackPools:
+    """Candidate tracks per mood with their refresh time, saved as one JSON file.
+
+    path=None keeps the pools in memory only. Pools are replaced whole, so
+    readers on other threads never see a half-built pool.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_age=REFRESH_SECONDS):
+        self.path = path
+        self.max_age = max_age
+        self._pools = {}
+        self._lock = threading.Lock()
+        self.samples = self.misses = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._pools.update(json.load(f))
+            except Exception as e:
+                print(f"⚠️ Couldn't load track pools {path}: {e}")
+
+    def tracks(self, mood):
+        with self._lock:
+            return self._pools.get(mood, {}).get("tracks", [])
+
+    def age(self, mood, now=None):
+        """Seconds since the mood's pool was rebuilt, or None if it has none."""
+        with self._lock:
+            pool = self._pools.get(mood)
+        if not pool:
+            return None
+        return (time.time() if now is None else now) - pool["refreshed"]
+
+    def is_stale(self, mood, now=None):
+        age = self.age(mood, now)
+        return age is None or age >= self.max_age
+
+    def sample(self, mood, k=SAMPLE_SIZE, rng=random):
+        """Return k random tracks from the mood's pool, or None when it is empty."""
+        tracks = self.tracks(mood)
+        if not tracks:
+            self.misses += 1
+            return None
+        self.samples += 1
+        return rng.sample(tracks, min(k, len(tracks)))
+
+    def put(self, mood, tracks, now=None):
+        """Replace the mood's pool (deduplicated by id) and persist all pools."""
+        unique = list({track["id"]: slim_track(track) for track in tracks if track.get("id")}.values())
+        with self._lock:
+            self._pools[mood] = {"refreshed": time.time() if now is None else now, "tracks": unique}
+        self.save()
+        return len(unique)
+
+    def save(self, path=None):
+        """Write all pools to path or the configured path."""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            snapshot = dict(self._pools)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, path)
+
+    def stats(self, now=None):
+        """Return {mood: {tracks, age}} plus the sample/miss counters."""
+        with self._lock:
+            moods = list(self._pools)
+        return {
+            "pools": {mood: {"tracks": len(self.tracks(mood)), "age": self.age(mood, now)} for mood in moods},
+            "samples": self.samples,
+            "misses": self.misses,
+        }
+
+class PoolRefresher:
+    """Background task keeping one pool per mood in settings fresh.
+
+    fetch is a coroutine function (client, mood, mood_config, size) returning
+    track objects. A failed rebuild (or a failed save) keeps the old pool and is
+    retried after RETRY_SECONDS; otherwise the task sleeps until the next pool
+    goes stale.
+    """
+
+    def __init__(self, pools, client, settings, fetch, size=POOL_SIZE, retry=RETRY_SECONDS):
+        self.pools = pools
+        self.client = client
+        self.settings = settings
+        self.fetch = fetch
+        self.size = size
+        self.retry = retry
+        self.refreshes = self.failures = 0
+        self._future = None
+
+    async def refresh(self, force=False):
+        """Rebuild the stale pools (or all of them) concurrently; returns {mood: tracks} for those rebuilt."""
+        moods = [mood for mood in self.settings if force or self.pools.is_stale(mood)]
+        results = await asyncio.gather(
+            *(self.fetch(self.client, mood, self.settings[mood], self.size) for mood in moods),
+            return_exceptions=True,
+        )
+        rebuilt = {}
+        for mood, tracks in zip(moods, results):
+            if isinstance(tracks, BaseException) or not tracks:
+                self.failures += 1
+                print(f"⚠️ Couldn't refresh the {mood} track pool: {tracks or 'no tracks'}")
+                continue
+            rebuilt[mood] = self.pools.put(mood, tracks)
+            self.refreshes += 1
+        return rebuilt
+
+    def next_refresh_in(self, now=None):
+        """Seconds until the oldest pool goes stale (at least the retry delay)."""
+        ages = [self.pools.age(mood, now) for mood in self.settings]
+        if any(age is None for age in ages):
+            return self.retry
+        return max(self.retry, self.pools.max_age - max(ages))
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+                delay = self.next_refresh_in()
+            except Exception as e:
+                # e.g. the pools file couldn't be written; keep the task alive and try again
+                self.failures += 1
+                print(f"⚠️ Track pool refresh failed: {e}")
+                delay = self.retry
+            await asyncio.sleep(delay)
+
+    def start(self):
+        """Run on the shared Spotify event loop until stop(); returns self."""
+        if self._future is None or self._future.done():
+            self._future = submit_async(self.run())
+        return self
+
+    def stop(self):
+        if self._future is not None:
+            self._future.cancel()
+
+def track_pools_from_env():
+    """Open the pools at MOODY_POOL_PATH, stale after MOODY_POOL_REFRESH seconds."""
+    return TrackPools(os.getenv("MOODY_POOL_PATH", DEFAULT_PATH), float(os.getenv("MOODY_POOL_REFRESH", REFRESH_SECONDS)))
+
+def pool_size_from_env():
+    return int(os.getenv("MOODY_POOL_SIZE", POOL_SIZE))